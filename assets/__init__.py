@@ -3,14 +3,14 @@
     This module does not load audio as i have not implemented audio for the game.
 """
 
-import copy
 import os
 import pygame
 
-ASSET_PATH = "assets"
+# Directory of this module, so the sprites are found regardless of the working directory
+ASSET_PATH = os.path.dirname(os.path.abspath(__file__))
 
 # Dictionary of all sprites and their paths that are needed for the game
-sprites_dict = {
+sprite_paths = {
     # Texts
     "numbers": [
         "sprites/0.png",
@@ -58,10 +58,135 @@ sprites_dict = {
     "pipe-red": "sprites/pipe-red.png"
 }
 
-# Add ASSET_PATH path to file names, then loads the sprites into pygame objects
-for key, value in copy.deepcopy(sprites_dict).items():
-    if isinstance(value, list):
-        for index, value in enumerate(value):
-            sprites_dict[key][index] = pygame.image.load(os.path.join(ASSET_PATH, value))
-    else:
-        sprites_dict[key] = pygame.image.load(os.path.join(ASSET_PATH, value))
+
+def convert(image):
+    """
+    Converts the sprite into the pixel format of the display for faster blitting
+    If no display mode has been set (Headless mode), the sprite is returned as it is
+
+    :param image: type: pygame.Surface
+    The loaded pygame sprite
+
+    :return: type: pygame.Surface
+    The converted pygame sprite
+    """
+    if pygame.display.get_surface() is None:
+        return image
+
+    return image.convert()
+
+
+def convert_alpha(image):
+    """
+    Converts the sprite into the pixel format of the display with per pixel alpha for faster blitting
+    If no display mode has been set (Headless mode), the sprite is copied onto a per pixel alpha surface instead so
+    the transparent pixels, and therefore the collision masks, stay identical to the converted sprite
+
+    :param image: type: pygame.Surface
+    The loaded pygame sprite
+
+    :return: type: pygame.Surface
+    The converted pygame sprite
+    """
+    if pygame.display.get_surface() is not None:
+        return image.convert_alpha()
+
+    surface = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+    surface.blit(image, (0, 0))
+
+    return surface
+
+
+class AssetManager:
+    """
+    Loads the sprites on first use instead of at import, so sprites that are never used are never decoded
+    Indexing the asset manager returns the loaded sprite (Or list of sprites) the same way as a dictionary would
+
+    The sprites converted into the pixel format of the display are cached as well, so every sprite is converted once
+    instead of once per class instance or once per frame
+    Sprites converted before the display mode has been set (Headless mode) are cached separately, so they are never
+    used in place of the sprites converted for the display
+    """
+    def __init__(self, paths):
+        """
+        Constructor for the AssetManager class
+
+        :param paths: type: dict
+        Dictionary of the path (Or list of paths) of every sprite relative to ASSET_PATH, keyed by sprite name
+        """
+        self._paths = paths
+        self._sprites = {}
+        self._converted = {}
+
+    def __contains__(self, name):
+        return name in self._paths
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __getitem__(self, name):
+        """
+        Returns the loaded sprite, loading it the first time it is used
+
+        :param name: type: str
+        Name of the sprite
+
+        :return: type: pygame.Surface or list
+        The loaded pygame sprite, or list of sprites
+        """
+        if name not in self._sprites:
+            path = self._paths[name]
+            if isinstance(path, list):
+                self._sprites[name] = [pygame.image.load(os.path.join(ASSET_PATH, item)) for item in path]
+            else:
+                self._sprites[name] = pygame.image.load(os.path.join(ASSET_PATH, path))
+
+        return self._sprites[name]
+
+    def _get_converted(self, name, function):
+        """
+        Returns the sprite converted by the function, converting it the first time it is used
+
+        :param name: type: str
+        Name of the sprite
+
+        :param function: type: function
+        Either convert or convert_alpha
+
+        :return: type: pygame.Surface or list
+        The converted pygame sprite, or list of sprites
+        """
+        key = (name, function, pygame.display.get_surface() is not None)
+        if key not in self._converted:
+            sprite = self[name]
+            self._converted[key] = [function(item) for item in sprite] if isinstance(sprite, list) else function(sprite)
+
+        return self._converted[key]
+
+    def convert(self, name):
+        """
+        Returns the sprite converted into the pixel format of the display, see convert
+
+        :param name: type: str
+        Name of the sprite
+
+        :return: type: pygame.Surface or list
+        The converted pygame sprite, or list of sprites
+        """
+        return self._get_converted(name, convert)
+
+    def convert_alpha(self, name):
+        """
+        Returns the sprite converted into the pixel format of the display with per pixel alpha, see convert_alpha
+
+        :param name: type: str
+        Name of the sprite
+
+        :return: type: pygame.Surface or list
+        The converted pygame sprite, or list of sprites
+        """
+        return self._get_converted(name, convert_alpha)
+
+
+# Every sprite needed for the game, loaded on first use
+sprites_dict = AssetManager(sprite_paths)
@@ -0,0 +1,396 @@
+"""
+    Performance benchmarks of the game loop, collision detection, network inference, training and bird construction
+
+    Every benchmark runs on fixed seeds so that the same work is measured on every run, the results are saved into a
+    JSON file which can be compared against a stored baseline to flag regressions
+    Every result is a rate, so higher is better, except for the memory results where lower is better
+"""
+
+import os
+
+# Render offscreen so that the rendering benchmark does not depend on a window or the display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from game.course import Course
+from game.bird import Bird
+from network import BatchedNetwork
+
+import numpy as np
+import contextlib
+import platform
+import argparse
+import tracemalloc
+import random
+import neat
+import json
+import time
+import sys
+import io
+import train
+
+# Global variables
+POPULATION_SIZES = [10, 100, 1000]
+CONSTRUCTION_SIZE = 10000
+LOWER_IS_BETTER = ["bytes/bird"]
+
+
+def create_genomes(config, size, seed):
+    """
+    Creates a population of new random genomes
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param size: type: int
+    Number of genomes
+
+    :param seed: type: int
+    Seed of the random module used by NEAT to create the genomes
+
+    :return: type: list
+    List containing the (genome_id, genome) tuple of every genome
+    """
+    random.seed(seed)
+    config.pop_size = size
+
+    return list(neat.Population(config).population.items())
+
+
+def benchmark_game_loop(config, size, frames, seed, headless):
+    """
+    Measures the frames per second of the training game loop, games on consecutive seeds are played until the number of
+    frames is reached
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param size: type: int
+    Number of birds in the population
+
+    :param frames: type: int
+    Number of frames to play
+
+    :param seed: type: int
+    Seed of the first population & pipe course
+
+    :param headless: type: bool
+    If False, every frame is rendered offscreen
+
+    :return: type: float
+    Frames per second
+    """
+    # The game loop renders the generation number of the training population
+    train.population = neat.Population(config)
+    train.FPS = 0
+
+    played = 0
+    elapsed = 0
+    while played < frames:
+        genomes = create_genomes(config, size, seed + played)
+        limits = train.GenerationLimits(max_steps=frames - played)
+
+        start = time.perf_counter()
+        played += train.play_game(genomes, config, Course(seed + played), headless, limits)
+        elapsed += time.perf_counter() - start
+
+    return played / elapsed
+
+
+def benchmark_check_crash(config, size, repeat, seed):
+    """
+    Measures the number of birds checked for crashes per second, the birds are spread over the height of the screen
+    right at a pipe so that every phase of the collision detection is exercised
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param size: type: int
+    Number of birds in the population
+
+    :param repeat: type: int
+    Number of times the whole population is checked
+
+    :param seed: type: int
+    Seed of the population & pipe course
+
+    :return: type: float
+    Birds checked per second
+    """
+    game_elements_dict = train.initialize_game_elements(create_genomes(config, size, seed), config, Course(seed))
+    flock = game_elements_dict['flock']
+
+    # Place the birds over the first pipe
+    game_elements_dict['pipe'][0].x = flock.x
+    flock.y[:] = np.linspace(-flock.height, train.DISPLAY_HEIGHT, flock.size)
+    flock.update()
+    for base in game_elements_dict['base']:
+        base.update_rect()
+
+    fitness_array = game_elements_dict['fitness'].copy()
+    elapsed = 0
+    for _ in range(repeat):
+        # Revive every bird so that the whole population is checked every time
+        flock.alive[:] = True
+        game_elements_dict['fitness'][:] = fitness_array
+
+        start = time.perf_counter()
+        train.check_crash(game_elements_dict)
+        elapsed += time.perf_counter() - start
+
+    return size * repeat / elapsed
+
+
+def benchmark_inference(config, size, repeat, seed, batched):
+    """
+    Measures the number of network activations per second
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param size: type: int
+    Number of networks
+
+    :param repeat: type: int
+    Number of times every network is activated
+
+    :param seed: type: int
+    Seed of the genomes & inputs
+
+    :param batched: type: bool
+    If True, every network is activated at once through BatchedNetwork, else one by one through
+    neat.nn.FeedForwardNetwork.activate
+
+    :return: type: float
+    Network activations per second
+    """
+    networks = [neat.nn.FeedForwardNetwork.create(genome, config)
+                for genome_id, genome in create_genomes(config, size, seed)]
+    inputs = np.random.RandomState(seed).uniform(-train.DISPLAY_HEIGHT, train.DISPLAY_HEIGHT, (repeat, size, 3))
+
+    if batched:
+        batched_network = BatchedNetwork(networks)
+        start = time.perf_counter()
+        for frame_inputs in inputs:
+            batched_network.activate(frame_inputs)
+    else:
+        inputs = inputs.tolist()
+        start = time.perf_counter()
+        for frame_inputs in inputs:
+            for network, network_inputs in zip(networks, frame_inputs):
+                network.activate(network_inputs)
+
+    return size * repeat / (time.perf_counter() - start)
+
+
+def benchmark_training(config, size, generations, max_steps, seed):
+    """
+    Measures the number of generations per second of the headless train.fitness function, every generation is limited
+    to a number of frames so that a generation reaching the score limit does not dominate the result
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param size: type: int
+    Number of genomes in the population
+
+    :param generations: type: int
+    Number of generations to train
+
+    :param max_steps: type: int
+    Maximum number of frames of every generation
+
+    :param seed: type: int
+    Seed of the population & every pipe course
+
+    :return: type: float
+    Generations per second
+    """
+    train.HEADLESS = True
+    train.generation_limits = train.GenerationLimits(max_steps=max_steps)
+
+    random.seed(seed)
+    config.pop_size = size
+    population = neat.Population(config)
+
+    start = time.perf_counter()
+    population.run(train.fitness, generations)
+
+    # Training stops early if the fitness threshold is reached
+    return population.generation / (time.perf_counter() - start)
+
+
+def benchmark_bird_construction(size, memory):
+    """
+    Measures the cost of constructing a population of Bird class instances, as done by the testing script
+
+    :param size: type: int
+    Number of birds constructed
+
+    :param memory: type: bool
+    If True, the memory allocated per bird is measured with tracemalloc, else the number of birds constructed per
+    second is measured without tracemalloc slowing the construction down
+
+    :return: type: float
+    Birds constructed per second, or bytes allocated per bird
+    """
+    # Load the class-level sprites before measuring
+    Bird(0, 0)
+
+    if not memory:
+        start = time.perf_counter()
+        birds = [Bird(0, 0) for _ in range(size)]
+        return len(birds) / (time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        birds = [Bird(0, 0) for _ in range(size)]
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    return allocated / len(birds)
+
+
+def run_benchmarks(config, seed, quick, repeat):
+    """
+    Runs every benchmark
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param seed: type: int
+    Seed of every benchmark
+
+    :param quick: type: bool
+    If True, less work is measured for a faster but noisier run
+
+    :param repeat: type: int
+    Number of times every benchmark is run, the best result is kept as it is the least disturbed by other processes
+
+    :return: type: dict
+    Dictionary of the result & unit of every benchmark, keyed by benchmark name
+    """
+    scale = 10 if quick else 1
+    benchmarks = [
+        ("game_loop/headless", "frames/s", lambda: benchmark_game_loop(config, 100, 20000 // scale, seed, True)),
+        ("game_loop/rendered", "frames/s", lambda: benchmark_game_loop(config, 100, 2000 // scale, seed, False)),
+    ]
+    for size in POPULATION_SIZES:
+        benchmarks.append(("check_crash/{}".format(size), "birds/s",
+                           lambda size=size: benchmark_check_crash(config, size, 100000 // size // scale + 1, seed)))
+    for size in POPULATION_SIZES:
+        benchmarks.append(("inference/batched/{}".format(size), "activations/s",
+                           lambda size=size: benchmark_inference(config, size, 100000 // size // scale + 1, seed, True)))
+        benchmarks.append(("inference/neat/{}".format(size), "activations/s",
+                           lambda size=size: benchmark_inference(config, size, 100000 // size // scale + 1, seed,
+                                                                 False)))
+    benchmarks.append(("training/fitness", "generations/s",
+                       lambda: benchmark_training(config, 100, 10 // min(scale, 5), 5000 // scale, seed)))
+    benchmarks.append(("construction/bird", "birds/s", lambda: benchmark_bird_construction(CONSTRUCTION_SIZE, False)))
+    benchmarks.append(("memory/bird", "bytes/bird", lambda: benchmark_bird_construction(CONSTRUCTION_SIZE, True)))
+
+    results = {}
+    for name, unit, benchmark in benchmarks:
+        # Silence the messages printed by the game loop & NEAT
+        with contextlib.redirect_stdout(io.StringIO()):
+            values = [benchmark() for _ in range(repeat)]
+        value = min(values) if unit in LOWER_IS_BETTER else max(values)
+        results[name] = {"value": value, "unit": unit}
+        print("{:<28} {:>14.1f} {}".format(name, value, unit))
+
+    return results
+
+
+def compare_results(results, baseline, tolerance):
+    """
+    Compares the results against a baseline, a benchmark is a regression if it is slower, or uses more memory, than the
+    baseline by more than the tolerance
+
+    :param results: type: dict
+    The results of run_benchmarks
+
+    :param baseline: type: dict
+    The results of a previous run_benchmarks
+
+    :param tolerance: type: float
+    Fraction of the baseline a benchmark can be worse by before being flagged, e.g. 0.1 for 10%
+
+    :return: type: list
+    List of the names of the regressed benchmarks
+    """
+    regressions = []
+    print("\n{:<28} {:>14} {:>14} {:>9}".format("Benchmark", "Baseline", "Result", "Change"))
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        change = result["value"] / baseline[name]["value"] - 1
+        worse = change > tolerance if result["unit"] in LOWER_IS_BETTER else change < -tolerance
+        flag = ""
+        if worse:
+            regressions.append(name)
+            flag = "REGRESSION"
+        print("{:<28} {:>14.1f} {:>14.1f} {:>+8.1%} {}".format(name, baseline[name]["value"], result["value"], change,
+                                                               flag))
+
+    return regressions
+
+
+if __name__ == '__main__':
+    """
+    Running the benchmarks
+
+    What it does:
+        1. Parse command line options & import our configuration file to use as settings values
+        2. Run every benchmark
+        3. Save the results into a JSON file
+        4. Compare the results against a baseline if provided, exiting with an error if any benchmark regressed
+    """
+    # Parse command line options
+    parser = argparse.ArgumentParser(description="Benchmark the game loop, collision detection, inference, training & "
+                                                 "bird construction")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of every benchmark")
+    parser.add_argument("--output", default="benchmark.json",
+                        help="JSON file the results are saved into")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON file of previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Fraction a benchmark can be worse than the baseline by before being flagged")
+    parser.add_argument("--quick", action="store_true",
+                        help="Measure less work for a faster but noisier run")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of times every benchmark is run, the best result is kept")
+    args = parser.parse_args()
+
+    # Import config file
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                                neat.DefaultStagnation, 'neat-config.ini')
+
+    # Run benchmarks & save results
+    results = run_benchmarks(config, args.seed, args.quick, args.repeat)
+    with open(args.output, 'w') as file:
+        json.dump({
+            "seed": args.seed,
+            "quick": args.quick,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results
+        }, file, indent=4)
+    print("Results saved to {}".format(args.output))
+
+    # Compare against baseline
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+
+        # Results are only comparable when the same work was measured
+        if (baseline["seed"], baseline["quick"]) != (args.seed, args.quick):
+            print("Warning: the baseline was measured with different --seed or --quick options")
+
+        regressions = compare_results(results, baseline["results"], args.tolerance)
+
+        if regressions:
+            print("\n{} benchmark(s) regressed by more than {:.0%}".format(len(regressions), args.tolerance))
+            sys.exit(1)
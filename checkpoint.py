@@ -0,0 +1,178 @@
+"""
+    NEAT checkpoint module used to save the whole training state periodically and resume training from it
+"""
+
+import itertools
+import tempfile
+import pickle
+import random
+import copy
+import gzip
+import neat
+import os
+
+
+class Checkpointer(neat.reporting.BaseReporter):
+    """
+    NEAT reporter saving the training state at the end of every few generations, so that an interrupted training run
+    can be resumed from the last checkpoint instead of starting over
+
+    A checkpoint contains the population, species set, best genome, genome & species id counters, the state of the
+    random module and the statistics reporter, so a resumed run continues exactly like an uninterrupted run would
+    Checkpoints are pickled, compressed with a fast gzip level & written to a temporary file that replaces the
+    checkpoint file once complete, so a run stopped while saving never leaves a corrupted checkpoint behind
+
+    Unlike neat.Checkpointer, the genome id counter is saved as well, so the resumed run does not create new genomes
+    with the ids of existing genomes
+    """
+    def __init__(self, population, statistics, interval=1, directory="checkpoints", keep=3):
+        """
+        Constructor for the Checkpointer class
+
+        :param population: type: neat.Population
+        The population being trained
+
+        :param statistics: type: neat.StatisticsReporter
+        Statistics reporter of the training run
+
+        :param interval: type: int
+        Number of generations between checkpoints
+
+        :param directory: type: str
+        Directory the checkpoints are saved into
+
+        :param keep: type: int
+        Number of most recent checkpoints kept, older checkpoints are deleted, every checkpoint is kept if None
+        """
+        self._population = population
+        self._statistics = statistics
+        self._interval = interval
+        self._directory = directory
+        self._keep = keep
+
+    def end_generation(self, config, population, species_set):
+        """
+        Saves a checkpoint if the generation that just ended is due one
+        """
+        # The population is already the population of the next generation
+        generation = self._population.generation + 1
+        if generation % self._interval == 0:
+            self.save(generation)
+
+    def save(self, generation):
+        """
+        Saves the training state as the checkpoint of the generation
+
+        :param generation: type: int
+        The generation the population is about to be evaluated for
+
+        :return: type: str
+        Path of the checkpoint
+        """
+        reproduction = self._population.reproduction
+        species_set = copy.copy(self._population.species)
+
+        # Counters are saved as the next id, the counters in use are replaced since reading them consumes an id
+        next_genome_id = next(reproduction.genome_indexer)
+        reproduction.genome_indexer = itertools.count(next_genome_id)
+        next_species_id = next(species_set.indexer)
+        self._population.species.indexer = itertools.count(next_species_id)
+
+        # Reporters are attached again when resuming
+        species_set.reporters = None
+        species_set.indexer = None
+
+        state = {
+            "generation": generation,
+            "population": self._population.population,
+            "species_set": species_set,
+            "best_genome": self._population.best_genome,
+            "next_genome_id": next_genome_id,
+            "next_species_id": next_species_id,
+            "ancestors": reproduction.ancestors,
+            "random_state": random.getstate(),
+            "most_fit_genomes": self._statistics.most_fit_genomes,
+            "generation_statistics": self._statistics.generation_statistics
+        }
+
+        # Write to a temporary file first, then replace the checkpoint in a single step
+        os.makedirs(self._directory, exist_ok=True)
+        path = os.path.join(self._directory, "checkpoint-{}.pkl.gz".format(generation))
+        with tempfile.NamedTemporaryFile(dir=self._directory, suffix=".tmp", delete=False) as file:
+            try:
+                with gzip.GzipFile(fileobj=file, mode='wb', compresslevel=1) as data:
+                    pickle.dump(state, data, protocol=pickle.HIGHEST_PROTOCOL)
+            except BaseException:
+                # Never leave a partial temporary file behind
+                file.close()
+                os.remove(file.name)
+                raise
+        os.replace(file.name, path)
+        print("Saved checkpoint to {}".format(path))
+
+        # Delete old checkpoints
+        if self._keep is not None:
+            for old_path in list_checkpoints(self._directory)[:-self._keep]:
+                os.remove(old_path)
+
+        return path
+
+
+def list_checkpoints(directory):
+    """
+    Lists the checkpoints of a directory from the oldest to the most recent generation
+
+    :param directory: type: str
+    Directory the checkpoints are saved into
+
+    :return: type: list
+    List containing the path of every checkpoint
+    """
+    if not os.path.isdir(directory):
+        return []
+
+    checkpoints = [name for name in os.listdir(directory) if name.startswith("checkpoint-") and name.endswith(".pkl.gz")]
+    checkpoints.sort(key=lambda name: int(name[len("checkpoint-"):-len(".pkl.gz")]))
+
+    return [os.path.join(directory, name) for name in checkpoints]
+
+
+def restore_checkpoint(path, config, statistics):
+    """
+    Resumes the training state of a checkpoint
+
+    :param path: type: str
+    Path of the checkpoint, or a directory to resume the most recent checkpoint of
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param statistics: type: neat.StatisticsReporter
+    Statistics reporter of the resumed run, the statistics of the checkpoint are restored into it
+
+    :return: type: neat.Population
+    The population at the generation of the checkpoint
+    """
+    if os.path.isdir(path):
+        checkpoints = list_checkpoints(path)
+        if not checkpoints:
+            raise FileNotFoundError("No checkpoints found in {}".format(path))
+        path = checkpoints[-1]
+
+    with gzip.open(path, 'rb') as data:
+        state = pickle.load(data)
+    print("Resuming from checkpoint {}".format(path))
+
+    # Rebuild the population around the saved species set
+    population = neat.Population(config, (state["population"], state["species_set"], state["generation"]))
+    population.species.reporters = population.reporters
+    population.species.indexer = itertools.count(state["next_species_id"])
+    population.best_genome = state["best_genome"]
+    population.reproduction.genome_indexer = itertools.count(state["next_genome_id"])
+    population.reproduction.ancestors = state["ancestors"]
+
+    random.setstate(state["random_state"])
+    statistics.most_fit_genomes = state["most_fit_genomes"]
+    statistics.generation_statistics = state["generation_statistics"]
+
+    return population
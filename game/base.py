@@ -5,6 +5,7 @@
 
 
 from assets import sprites_dict
+import pygame
 
 
 class Base:
@@ -17,7 +18,10 @@ class Base:
     velocity controls the amount of pixels the base moves every tick
     image contains the loaded base pygame sprite object
     width and height contains the sprite width and height in pixels
+    Every base references the same converted sprite, instances only hold their position in __slots__
     """
+    __slots__ = ('_x', '_y', '_rect', '_image')
+
     velocity = 5
     image = sprites_dict['base']
     width, height = image.get_width(), image.get_height()
@@ -37,7 +41,7 @@ class Base:
         self._x = x
         self._y = y
         self._rect = None
-        self.image = self.image.convert()
+        self._image = sprites_dict.convert('base')
 
     # Getter & setter methods
     @property
@@ -58,6 +62,15 @@ class Base:
         """
         self._x -= self.velocity
 
+    def update_rect(self):
+        """
+        Calculates the area of the screen the base occupies without drawing it to the screen
+        Used in headless mode where nothing is rendered but the rect is still needed for collision detection
+        """
+        screen_rect = pygame.Rect(0, 0, sprites_dict['background-day'].get_width(),
+                                  sprites_dict['background-day'].get_height())
+        self._rect = self._image.get_rect(topleft=(self._x, self._y)).clip(screen_rect)
+
     def draw_to_screen(self, screen):
         """
         Draws/renders the base to the pygame screen
@@ -65,5 +78,5 @@ class Base:
         :param screen: type: pygame.surface
         The surface/screen of the game for displaying purposes
         """
-        self._rect = screen.blit(self.image, (self._x, self._y))
+        self._rect = screen.blit(self._image, (self._x, self._y))
 
@@ -4,7 +4,7 @@
 """
 
 
-from assets import sprites_dict
+from assets import sprites_dict, convert_alpha
 from game.textbox import Textbox
 import pygame
 
@@ -22,12 +22,24 @@ class Bird:
     max_tilt is the maximum angle of tilt allowed for the bird when it is flapping up (Calculated from normal state)
     min_tilt is the maximum angle of tilt allowed for the bird when it is nose diving down
     (Calculated from normal state)
+    tilt_step is the amount of degrees the tilt changes by, every tilt is a multiple of it
+    sprite_tables maps every (state, tilt) pair to its tilted sprite, mask and bounding rect, it is shared by every bird
+    and only built once on first use
+    A table built before the display mode has been set (Headless mode) is kept separately from the table converted for
+    the display, the same as the AssetManager, so unconverted sprites are never blitted to the display
+
+    Instances only hold their own position & animation state in __slots__, the sprites are shared through the class
+    attributes & the name label is only created the first time it is drawn, so creating a large population is cheap
     """
+    __slots__ = ('_x', '_y', '_state', '_animation_tick', '_tilt_tick', '_tilt', '_velocity', '_rect', '_label')
+
     image = sprites_dict['yellowbird']
     width, height = image[0].get_width(), image[0].get_height()
     state_cycle_rate = 5
     max_tilt = 30
     min_tilt = -90
+    tilt_step = 10
+    sprite_tables = {}
 
     def __init__(self, x, y):
         """
@@ -49,8 +61,7 @@ class Bird:
         self._tilt = 0
         self._velocity = 0
         self._rect = None
-        self._label = Textbox("black", "arialbd", 16)
-        self.image = [bird.convert_alpha() for bird in self.image]
+        self._label = None
 
     # Getter & setter methods
     @property
@@ -183,16 +194,62 @@ class Bird:
 
         return tilted_bird
 
+    @classmethod
+    def get_sprite_table(cls):
+        """
+        Builds the lookup table of every possible (state, tilt) pair the first time it is called, so that no rotation
+        or mask extraction is needed while the game is running
+        The table is built again once the display mode has been set, so the sprites are converted for faster blitting
+
+        :return: type: dict
+        Dictionary mapping (state, tilt) to a tuple of the tilted sprite, its mask and its bounding rect
+        """
+        display = pygame.display.get_surface() is not None
+        if display not in cls.sprite_tables:
+            sprite_table = {}
+            for state, image in enumerate(cls.image):
+                image = convert_alpha(image)
+                for tilt in range(cls.min_tilt, cls.max_tilt + 1, cls.tilt_step):
+                    tilted_bird = cls.tilt_bird(image, tilt)
+                    sprite_table[(state, tilt)] = (tilted_bird, pygame.mask.from_surface(tilted_bird),
+                                                   tilted_bird.get_rect())
+            cls.sprite_tables[display] = sprite_table
+
+        return cls.sprite_tables[display]
+
     def get_mask(self):
         """
-        Extracts the mask from the sprite to provide pixel based collision detection
+        Looks up the mask of the current sprite to provide pixel based collision detection
 
         :return: type: pygame.mask.Mask
         The extracted mask object
         """
-        mask = pygame.mask.from_surface(self.tilt_bird(self.image[self._state], self._tilt))
+        return self.get_sprite_table()[(self._state, self._tilt)][1]
 
-        return mask
+    def collide_mask(self, mask, offset):
+        """
+        Pixel based collision detection between the bird and another mask
+        A cheap bounding box test is done first, the masks are only compared pixel by pixel when the bounding boxes
+        overlap
+
+        :param mask: type: pygame.mask.Mask
+        The mask to test against
+
+        :param offset: type: tuple
+        x & y offset of the other mask from the top-left corner of the bird
+
+        :return: type: tuple
+        The first overlapping point, or None if there is no overlap
+        """
+        bird_mask = self.get_mask()
+        width, height = bird_mask.get_size()
+        mask_width, mask_height = mask.get_size()
+
+        # Broad phase, the masks can only overlap if the bounding boxes overlap
+        if not (offset[0] < width and offset[0] + mask_width > 0 and offset[1] < height and offset[1] + mask_height > 0):
+            return None
+
+        return bird_mask.overlap(mask, offset)
 
     def draw_name_label(self, model_name, screen):
         """
@@ -205,6 +262,10 @@ class Bird:
         :param screen: type: pygame.surface
         The surface/screen of the game for displaying purposes
         """
+        # Create the label on first use, the training script never draws it
+        if self._label is None:
+            self._label = Textbox("black", "arialbd", 16)
+
         # Draw label of bird to screen
         # Set coordinates
         self._label.center_x = self._x + self.width/2
@@ -214,6 +275,20 @@ class Bird:
         # Draw label above bird
         self._label.draw_to_screen(screen)
 
+    def update(self):
+        """
+        Cycles the flap animation states and calculates the area of the screen the bird occupies without drawing it
+        Used in headless mode where nothing is rendered but the rect is still needed for collision detection
+        """
+        # Cycle flap animation states
+        self.flap_animation_tick_handler()
+
+        # Calculate the rect the same way blitting would, clipped to the screen
+        screen_rect = pygame.Rect(0, 0, sprites_dict['background-day'].get_width(),
+                                  sprites_dict['background-day'].get_height())
+        rect = self.get_sprite_table()[(self._state, self._tilt)][2]
+        self._rect = pygame.Rect((self._x, self._y), rect.size).clip(screen_rect)
+
     def draw_to_screen(self, screen):
         """
         Draws/renders the bird to the pygame screen
@@ -225,4 +300,4 @@ class Bird:
         self.flap_animation_tick_handler()
 
         # Draw bird
-        self._rect = screen.blit(self.tilt_bird(self.image[self._state], self._tilt), (self._x, self._y))
+        self._rect = screen.blit(self.get_sprite_table()[(self._state, self._tilt)][0], (self._x, self._y))
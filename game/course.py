@@ -0,0 +1,70 @@
+"""
+    Flappy bird Course class.
+    Responsible for generating the sequence of pipe gap positions for a game
+"""
+
+
+from assets import sprites_dict
+import numpy as np
+import random
+
+
+class Course:
+    """
+    Course class
+    A course is the sequence of y coordinates of every lower pipe in a game, generated from a seed so that the same seed
+    always produces the same course
+    The y coordinates are precomputed into a compact array in chunks, and extended with the next chunk whenever a game
+    goes past the end of the array
+
+    min_y and max_y are the lowest and highest y coordinates a lower pipe can be placed at
+    chunk_size is the amount of y coordinates generated at once
+    """
+    min_y = round(sprites_dict['background-day'].get_height() * (3 / 10))
+    max_y = round(sprites_dict['background-day'].get_height() * (7 / 10))
+    chunk_size = 1024
+
+    def __init__(self, seed=None):
+        """
+        Constructor for Course class
+
+        :param seed: type: int
+        Seed of the course, a random seed is picked if not provided
+        """
+        self._seed = random.randrange(2 ** 32) if seed is None else seed
+        self._rng = random.Random(self._seed)
+        self._lower_y = np.empty(0, dtype=np.int16)
+
+        # Precompute the first chunk
+        self.extend()
+
+    # Getter & setter methods
+    @property
+    def seed(self):
+        return self._seed
+
+    def __len__(self):
+        return len(self._lower_y)
+
+    def __getitem__(self, index):
+        """
+        Returns the y coordinate of the lower pipe at the index of the course
+
+        :param index: type: int
+        Index of the pipe in the course, counting from the first pipe of the game
+
+        :return: type: int
+        y coordinate of the lower pipe
+        """
+        while index >= len(self._lower_y):
+            self.extend()
+
+        return int(self._lower_y[index])
+
+    def extend(self):
+        """
+        Generates the next chunk of y coordinates and appends it to the course
+        """
+        chunk = np.array([self._rng.randint(self.min_y, self.max_y) for _ in range(self.chunk_size)],
+                         dtype=np.int16)
+        self._lower_y = np.concatenate((self._lower_y, chunk))
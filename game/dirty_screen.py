@@ -0,0 +1,123 @@
+"""
+    Flappy bird DirtyScreen class.
+    Responsible for redrawing & updating only the areas of the screen that changed since the last frame
+"""
+
+
+import pygame
+
+
+class DirtyScreen:
+    """
+    DirtyScreen class
+    Wraps the pygame window so that the game elements draw to it as they would to the window, while every blit is
+    recorded as a dirty rect
+
+    Every frame, clear restores the background only over the areas drawn in the previous frame, instead of blitting
+    the whole background, and update passes only the cleared & newly drawn areas to pygame.display.update, instead of
+    updating the whole window
+    The first frame is always fully drawn & updated, and the dirty rect tracking is disabled unless enabled, the whole
+    window is then redrawn & updated every frame
+    A frame with many dirty rects (E.g. a large population of birds) is fully redrawn & updated as well, since handling
+    every rect one by one then costs more than redrawing & updating the whole window once
+
+    max_rects is the number of dirty rects above which the whole window is redrawn or updated instead
+    max_area is the fraction of the window covered by the dirty rects above which the whole window is redrawn or
+    updated instead
+    """
+    max_rects = 64
+    max_area = 0.5
+
+    def __init__(self, screen, background, dirty=False):
+        """
+        Constructor for DirtyScreen class
+
+        :param screen: type: pygame.surface
+        The pygame window object
+
+        :param background: type: pygame.surface
+        Background sprite of the game converted for the display, the cleared areas are restored from it
+
+        :param dirty: type: bool
+        If False, the whole window is redrawn & updated every frame
+        """
+        self._screen = screen
+        self._background = background
+        self._dirty = dirty
+        self._full = True
+        self._window_area = screen.get_width() * screen.get_height()
+        self._previous = set()
+        self._cleared = set()
+        self._drawn = []
+
+    # Getter & setter methods
+    @property
+    def screen(self):
+        return self._screen
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def _is_large(self, rects):
+        """
+        Checks if the rects are too many or cover too much of the window to be handled one by one
+
+        :param rects: type: set
+        Set of the (x, y, width, height) tuple of every rect
+
+        :return: type: bool
+        True if the whole window should be redrawn or updated instead, else False
+        """
+        if len(rects) > self.max_rects:
+            return True
+
+        # Overlapping rects are counted more than once, the covered area is overestimated at worst
+        return sum(width * height for x, y, width, height in rects) > self.max_area * self._window_area
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        """
+        Same as pygame.Surface.blit on the window, the drawn area is recorded as dirty
+
+        :return: type: pygame.Rect
+        The area of the window drawn to
+        """
+        rect = self._screen.blit(source, dest, area, special_flags)
+        self._drawn.append(rect)
+
+        return rect
+
+    def clear(self):
+        """
+        Clears the previous frame by restoring the background over the areas drawn since the last clear
+        """
+        if self._full or not self._dirty or self._is_large(self._previous):
+            self._screen.blit(self._background, (0, 0))
+        else:
+            for rect in self._previous:
+                self._screen.blit(self._background, rect, rect)
+
+        self._cleared = self._previous
+        self._previous = set()
+
+    def update(self):
+        """
+        Updates the cleared & drawn areas of the window, the drawn areas are cleared by the next clear
+        """
+        # Elements drawn more than once (E.g. the game-over text drawn without clearing in between) are only
+        # recorded once
+        drawn = set(tuple(rect) for rect in self._drawn)
+
+        if self._full or not self._dirty:
+            pygame.display.update()
+            self._full = False
+        else:
+            rects = self._cleared | drawn
+            if self._is_large(rects):
+                pygame.display.update()
+            else:
+                pygame.display.update(list(rects))
+
+        self._previous |= drawn
+        self._cleared = set()
+        self._drawn = []
@@ -0,0 +1,271 @@
+"""
+    Flappy bird Flock class.
+    Responsible for simulating a whole population of birds at once for the training script
+"""
+
+
+from assets import sprites_dict
+from game.bird import Bird
+import numpy as np
+import pygame
+
+
+class Flock:
+    """
+    Flock class
+    Holds every bird of a population as arrays (Struct of arrays) instead of a list of Bird class instances, so that the
+    whole population is advanced in a single batched step every tick
+    The physics and animation follow the Bird class exactly, a bird at index i of the flock behaves the same as a Bird
+    class instance given the same sequence of jumps
+
+    width and height contains the width and height of the sprite in pixels
+    state_cycle_rate, max_tilt and min_tilt are shared with the Bird class
+    The tilted sprites & masks are looked up from the sprite table shared with the Bird class
+    """
+    width, height = Bird.width, Bird.height
+    state_cycle_rate = Bird.state_cycle_rate
+    max_tilt = Bird.max_tilt
+    min_tilt = Bird.min_tilt
+
+    def __init__(self, x, y, size):
+        """
+        Constructor for Flock class
+
+        :param x: type: int
+        x pixel coordinates of every bird on the screen
+        Note: The coordinates refer to the top-left corner of the sprite
+
+        :param y: type: int
+        Starting y pixel coordinates of every bird on the screen
+        Note: The coordinates refer to the top-left corner of the sprite
+
+        :param size: type: int
+        Number of birds in the flock
+        """
+        self._x = x
+        self._y = np.full(size, y, dtype=np.float64)
+        self._velocity = np.zeros(size, dtype=np.float64)
+        self._state = np.zeros(size, dtype=np.int64)
+        self._animation_tick = np.zeros(size, dtype=np.int64)
+        self._tilt_tick = np.zeros(size, dtype=np.int64)
+        self._tilt = np.zeros(size, dtype=np.int64)
+        self._alive = np.ones(size, dtype=bool)
+        self._rect = np.zeros((size, 4), dtype=np.int64)
+
+        # Width & height of the tilted sprite for every (state, tilt) pair, indexed by state & tilt step
+        sprite_table = Bird.get_sprite_table()
+        self._sprite_size = np.array([[sprite_table[(state, tilt)][2].size
+                                       for tilt in range(self.min_tilt, self.max_tilt + 1, Bird.tilt_step)]
+                                      for state in range(len(Bird.image))], dtype=np.int64)
+        self._max_width = int(self._sprite_size[:, :, 0].max())
+
+    # Getter & setter methods
+    @property
+    def x(self):
+        return self._x
+
+    @property
+    def y(self):
+        return self._y
+
+    @property
+    def alive(self):
+        return self._alive
+
+    @property
+    def size(self):
+        return len(self._alive)
+
+    @property
+    def max_width(self):
+        return self._max_width
+
+    def rect(self, index):
+        """
+        Returns the rect of a single bird from the last time the flock was drawn or updated
+
+        :param index: type: int
+        Index of the bird in the flock
+
+        :return: type: pygame.Rect
+        The rect of the bird
+        """
+        left, top, right, bottom = self._rect[index]
+
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def sprite_size(self):
+        """
+        Looks up the width & height of the current tilted sprite of every bird, which is also the size of their masks
+
+        :return: type: tuple
+        Tuple containing the array of widths and the array of heights
+        """
+        size = self._sprite_size[self._state, (self._tilt - self.min_tilt) // Bird.tilt_step]
+
+        return size[:, 0], size[:, 1]
+
+    def colliderect(self, rect):
+        """
+        Batched version of pygame.Rect.colliderect between the rect of every surviving bird and another rect
+
+        :param rect: type: pygame.Rect
+        The rect to test against
+
+        :return: type: numpy.ndarray
+        Boolean array the size of the flock, True for surviving birds whose rect overlaps the other rect
+        """
+        if rect.width == 0 or rect.height == 0:
+            return np.zeros(self.size, dtype=bool)
+
+        left, top, right, bottom = self._rect.T
+
+        return (self._alive & (right > left) & (bottom > top) &
+                (left < rect.right) & (right > rect.left) & (top < rect.bottom) & (bottom > rect.top))
+
+    def compact(self):
+        """
+        Removes every dead bird from the flock in a single pass, the surviving birds keep their order
+
+        :return: type: numpy.ndarray
+        The indexes the surviving birds had before compacting, used to compact any list kept alongside the flock
+        """
+        survivors = np.flatnonzero(self._alive)
+
+        self._y = self._y[survivors]
+        self._velocity = self._velocity[survivors]
+        self._state = self._state[survivors]
+        self._animation_tick = self._animation_tick[survivors]
+        self._tilt_tick = self._tilt_tick[survivors]
+        self._tilt = self._tilt[survivors]
+        self._alive = self._alive[survivors]
+        self._rect = self._rect[survivors]
+
+        return survivors
+
+    def step(self, jump):
+        """
+        Advances every surviving bird by a single tick
+        Birds flagged to jump behave as Bird.jump, the rest behave as Bird.do_nothing
+
+        :param jump: type: numpy.ndarray
+        Boolean array the size of the flock, True for birds that are jumping/flapping this tick
+        """
+        alive = self._alive
+        jumping = alive & jump
+        falling = alive & ~jump
+
+        # Set velocity for jumping & decay velocity when not jumping
+        self._velocity[jumping] = 10.5
+        self._velocity[falling] -= 1
+
+        # Ensure velocity does not pass terminal velocity, then updates new y
+        np.minimum(self._velocity, 12, out=self._velocity, where=alive)
+        np.subtract(self._y, self._velocity, out=self._y, where=alive)
+
+        # Tilt up & reset tilt_tick to provide tilt immunity
+        self._tilt[jumping] = 20
+        self._tilt_tick[jumping] = 0
+
+        # Increment tick and tilt down once passing the threshold
+        self._tilt_tick[falling] += 1
+        self._tilt[falling & (self._tilt_tick > 15)] -= 10
+
+        # Make sure the tilt stays between min & max thresholds
+        np.clip(self._tilt, self.min_tilt, self.max_tilt, out=self._tilt, where=alive)
+
+    def flap_animation_tick_handler(self):
+        """
+        Batched version of Bird.flap_animation_tick_handler for every surviving bird
+        Nose diving birds are set to the non-flapping state, the rest cycle through the flapping states
+        """
+        alive = self._alive
+        nose_dive = alive & (self._tilt == -90)
+        flapping = alive & ~nose_dive
+
+        # If nose dive, set to non-flapping state
+        self._state[nose_dive] = 1
+
+        # Increment tick & cycle animation if pass threshold tick
+        self._animation_tick[flapping] += 1
+        cycle = flapping & (self._animation_tick >= self.state_cycle_rate)
+        self._state[cycle] = (self._state[cycle] + 1) % 3
+        self._animation_tick[cycle] = 0
+
+    def get_sprite(self, index):
+        """
+        Returns the tilted sprite of a single bird according to its current flap state and tilt
+
+        :param index: type: int
+        Index of the bird in the flock
+
+        :return: type: pygame.Surface
+        pygame sprite of the tilted bird
+        """
+        return Bird.get_sprite_table()[(self._state[index], self._tilt[index])][0]
+
+    def get_mask(self, index):
+        """
+        Looks up the mask of the sprite of a single bird to provide pixel based collision detection
+
+        :param index: type: int
+        Index of the bird in the flock
+
+        :return: type: pygame.mask.Mask
+        The extracted mask object
+        """
+        return Bird.get_sprite_table()[(self._state[index], self._tilt[index])][1]
+
+    def update_rects(self):
+        """
+        Calculates the area of the screen every surviving bird occupies the same way blitting would, by truncating
+        the coordinates and clipping the sprite rect to the screen
+        """
+        width, height = self.sprite_size()
+        left = int(self._x)
+        top = np.trunc(self._y).astype(np.int64)
+
+        # Clip to the screen, a rect fully outside the screen ends up empty
+        clipped_left = max(left, 0)
+        clipped_right = np.maximum(np.minimum(left + width, sprites_dict['background-day'].get_width()), clipped_left)
+        clipped_top = np.maximum(top, 0)
+        clipped_bottom = np.maximum(np.minimum(top + height, sprites_dict['background-day'].get_height()), clipped_top)
+
+        # Rects of dead birds are updated as well, they are never read
+        self._rect[:, 0] = clipped_left
+        self._rect[:, 1] = clipped_top
+        self._rect[:, 2] = clipped_right
+        self._rect[:, 3] = clipped_bottom
+
+    def update(self):
+        """
+        Cycles the flap animation states and calculates the area of the screen every surviving bird occupies without
+        drawing them
+        Used in headless mode where nothing is rendered but the rects are still needed for collision detection
+        """
+        # Cycle flap animation states
+        self.flap_animation_tick_handler()
+
+        # Calculate the rects the same way blitting would
+        self.update_rects()
+
+    def draw_to_screen(self, screen, indexes=None):
+        """
+        Draws/renders every surviving bird to the pygame screen
+
+        :param screen: type: pygame.surface
+        The surface/screen of the game for displaying purposes
+
+        :param indexes: type: numpy.ndarray
+        Indexes of the surviving birds to draw, every surviving bird is drawn if not provided
+        The animation states & rects of the birds not drawn are still updated
+        """
+        # Cycle flap animation states
+        self.flap_animation_tick_handler()
+
+        # Draw birds
+        for index in (np.flatnonzero(self._alive) if indexes is None else indexes):
+            screen.blit(self.get_sprite(index), (self._x, self._y[index]))
+
+        # The rects match the area returned by blitting
+        self.update_rects()
@@ -4,7 +4,8 @@
 """
 
 
-from assets import sprites_dict
+from assets import sprites_dict, convert_alpha
+from game.course import Course
 import pygame
 import random
 
@@ -17,26 +18,40 @@ class Pipe:
     One rendered in the screen and another outside of the screen waiting to be rendered in once the first base moves out
     And when the pipe moves completely out of the screen, reset the position to the end of the other pipe
 
-    image contains the loaded pygame sprite for both upper and lower pipes
-    width and height contains the width and height of the sprite in pixels
+    width and height contains the width and height of the sprite in pixels, read from the shared sprites of the pipe
     velocity controls the amount of pixels the base moves every tick
     gap controls the distance in pixels between the upper and lower pipe
     interval controls the distance in pixels between each wave of pipe
+    sprite_table maps every pipe color (And whether a display exists) to its converted lower & upper pipe sprites and
+    masks, it is shared by every pipe and each color is only built once on first use
+    Sprites built before the display mode has been set (Headless mode) are kept separately from the sprites converted
+    for the display, the same as the AssetManager, so unconverted sprites are never blitted to the display
+    Instances only hold their position, course & references to the shared sprites in __slots__
     """
-    image = [sprites_dict['pipe-green'],
-             pygame.transform.flip(sprites_dict['pipe-green'], False, True)]
-    width, height = image[0].get_width(), image[0].get_height()
+    __slots__ = ('_x', '_upper_y', '_lower_y', '_upper_rect', '_lower_rect', '_passed', '_course', '_course_index',
+                 '_image', '_mask')
+
     velocity = 5
     gap = 135
     interval = 215
+    sprite_table = {}
 
-    def __init__(self, x):
+    def __init__(self, x, color="green", course=None, course_index=0):
         """
         Constructor for Pipe class
 
         :param x: type: int
         x coordinates of the pipe
         Note: The coordinates refer to the left corner of the sprite
+
+        :param color: type: str
+        Color of the pipe sprite, either green or red
+
+        :param course: type: game.course.Course
+        Course the y coordinates are read from, if not provided the y coordinates are randomed instead
+
+        :param course_index: type: int
+        Index of the pipe in the course
         """
         self._x = x
         self._upper_y = None
@@ -44,10 +59,12 @@ class Pipe:
         self._upper_rect = None
         self._lower_rect = None
         self._passed = False
-        self.image = [pipe.convert_alpha() for pipe in self.image]
+        self._course = course
+        self._course_index = course_index
+        self._image, self._mask = self.get_sprite_table(color)
 
         # Assign y
-        self.random_y()
+        self.assign_y()
 
     # Getter & setter methods
     @property
@@ -58,6 +75,14 @@ class Pipe:
     def x(self, val):
         self._x = val
 
+    @property
+    def width(self):
+        return self._image[0].get_width()
+
+    @property
+    def height(self):
+        return self._image[0].get_height()
+
     @property
     def lower_y(self):
         return self._lower_y
@@ -71,6 +96,10 @@ class Pipe:
         self._upper_y = (val - (self.gap + self.height))
         self._lower_y = val
 
+    @property
+    def course_index(self):
+        return self._course_index
+
     @property
     def passed(self):
         return self._passed
@@ -85,13 +114,37 @@ class Pipe:
         This function is used when the pipe is being repositioned back into the far right corner of the screen
         """
         # Random y between proportions of the screen
-        y = random.randint(round(sprites_dict['background-day'].get_height() * (3 / 10)),
-                           round(sprites_dict['background-day'].get_height() * (7 / 10)))
+        y = random.randint(Course.min_y, Course.max_y)
 
         # Reset pipe back to far right
         self._upper_y = (y - (self.gap + self.height))
         self._lower_y = y
 
+    def assign_y(self):
+        """
+        Assigns the y coordinate of the pipe from its index in the course, or randoms it if there is no course
+        """
+        if self._course is None:
+            self.random_y()
+        else:
+            self.lower_y = self._course[self._course_index]
+
+    def reposition(self, x, course_index):
+        """
+        Places the pipe back at the x coordinate as the pipe at the course index, used when the pipe is being
+        repositioned back into the far right corner of the screen
+
+        :param x: type: int
+        New x coordinates of the pipe
+
+        :param course_index: type: int
+        New index of the pipe in the course
+        """
+        self._x = x
+        self._course_index = course_index
+        self._passed = False
+        self.assign_y()
+
     def move(self):
         """
         Shift both upper & lower pipes towards the left at the same pace according to the velocity value
@@ -99,16 +152,35 @@ class Pipe:
         # Move both upper & lower pipes
         self._x -= self.velocity
 
-    def get_mask(self):
+    @classmethod
+    def get_sprite_table(cls, color):
         """
-        Extracts the mask from the sprite to provide pixel based collision detection
+        Converts the lower & upper pipe sprites of the color and extracts their masks the first time the color is
+        requested, so that every pipe of the same color shares them
+        The sprites are built again once the display mode has been set, so they are converted for faster blitting
+
+        :param color: type: str
+        Color of the pipe sprite, either green or red
 
-        :return: type: pygame.mask.Mask
-        The extracted mask object
+        :return: type: tuple
+        Tuple containing the list of lower & upper pipe sprites and the list of their masks
         """
-        masks = [pygame.mask.from_surface(pipe) for pipe in self.image]
+        key = (color, pygame.display.get_surface() is not None)
+        if key not in cls.sprite_table:
+            image = sprites_dict['pipe-{}'.format(color)]
+            images = [convert_alpha(image), convert_alpha(pygame.transform.flip(image, False, True))]
+            cls.sprite_table[key] = (images, [pygame.mask.from_surface(pipe) for pipe in images])
 
-        return masks
+        return cls.sprite_table[key]
+
+    def get_mask(self):
+        """
+        Returns the masks of the lower & upper pipe sprites to provide pixel based collision detection
+
+        :return: type: list
+        List containing the lower & upper pipe mask objects
+        """
+        return self._mask
 
     def draw_to_screen(self, screen):
         """
@@ -118,7 +190,7 @@ class Pipe:
         The surface/screen of the game for displaying purposes
         """
         # Lower pipe
-        self._lower_rect = screen.blit(self.image[0], (self._x, self._lower_y))
+        self._lower_rect = screen.blit(self._image[0], (self._x, self._lower_y))
 
         # Upper pipe
-        self._upper_rect = screen.blit(self.image[1], (self._x, self._upper_y))
+        self._upper_rect = screen.blit(self._image[1], (self._x, self._upper_y))
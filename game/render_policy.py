@@ -0,0 +1,134 @@
+"""
+    Flappy bird RenderPolicy class.
+    Responsible for choosing which birds of a large population are drawn every frame
+"""
+
+
+from assets import sprites_dict
+import numpy as np
+import pygame
+
+
+class RenderPolicy:
+    """
+    RenderPolicy class
+    Every bird of the population is still simulated, the policy only decides which of the surviving birds are drawn, so
+    that the rendering cost of a large population stays bounded and the screen stays readable
+
+    Modes:
+        1. all, every surviving bird is drawn
+        2. top, only the count best birds by current fitness are drawn
+           Surviving birds gain the same fitness every frame, so ties are broken by the distance of the bird from the
+           centre of the next pipe gap, the birds best placed to keep surviving are drawn
+        3. sample, only a random sample of count birds is drawn
+           The sample is drawn from a seeded hash of the genome ids, so the same birds are drawn every frame and a
+           crashed bird is replaced by the next bird of the sample instead of the whole sample changing
+        4. heatmap, no bird is drawn, the density of the y coordinates of the surviving birds is drawn instead
+
+    modes contains the name of every mode
+    bin_size is the height in pixels of every row of the heatmap
+    heatmap_color is the RGB color of the heatmap, the more birds in a row the more opaque the row
+    """
+    modes = ["all", "top", "sample", "heatmap"]
+    bin_size = 4
+    heatmap_color = (255, 64, 0)
+
+    def __init__(self, mode="all", count=20, seed=0):
+        """
+        Constructor for RenderPolicy class
+
+        :param mode: type: str
+        Name of the mode, one of modes
+
+        :param count: type: int
+        Number of birds drawn in the top & sample modes
+
+        :param seed: type: int
+        Seed of the sample mode
+        """
+        if mode not in self.modes:
+            raise ValueError("Unknown render mode {}, expected one of {}".format(mode, ", ".join(self.modes)))
+
+        self._mode = mode
+        self._count = count
+        self._seed = seed
+        self._heatmap = None
+
+    # Getter & setter methods
+    @property
+    def mode(self):
+        return self._mode
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def draws_labels(self):
+        return self._mode != "heatmap"
+
+    def select(self, fitness, distance, keys):
+        """
+        Selects the surviving birds to draw this frame
+
+        :param fitness: type: numpy.ndarray
+        Current fitness of every surviving bird
+
+        :param distance: type: numpy.ndarray
+        Distance in pixels of every surviving bird from the centre of the next pipe gap
+
+        :param keys: type: numpy.ndarray
+        Genome id of every surviving bird
+
+        :return: type: numpy.ndarray
+        Sorted indexes of the birds to draw, so that the birds are drawn in the same order as without a policy
+        """
+        size = len(fitness)
+        if self._mode == "all" or (self._mode != "heatmap" and size <= self._count):
+            return np.arange(size)
+        elif self._mode == "heatmap":
+            return np.arange(0)
+        elif self._mode == "top":
+            # Sort by descending fitness, then ascending distance
+            order = np.lexsort((distance, -np.asarray(fitness)))
+        else:
+            # Multiplicative hash of the genome ids, a fixed random order of the whole population
+            priority = (np.asarray(keys, dtype=np.uint64) * np.uint64(2654435761) + np.uint64(self._seed)) % 2 ** 32
+            order = np.argsort(priority, kind='stable')
+
+        return np.sort(order[:self._count])
+
+    def draw_heatmap(self, screen, x, y, width, height):
+        """
+        Draws the density of the y coordinates of the surviving birds as a single column of rows at their x coordinate
+
+        :param screen: type: pygame.surface
+        The surface/screen of the game for displaying purposes
+
+        :param x: type: int
+        x pixel coordinates of the birds
+
+        :param y: type: numpy.ndarray
+        y pixel coordinates of every surviving bird
+
+        :param width: type: int
+        Width of the birds sprite in pixels, the width of the column
+
+        :param height: type: int
+        Height of the birds sprite in pixels, the density is measured at the centre of the birds
+        """
+        screen_height = sprites_dict['background-day'].get_height()
+        if self._heatmap is None:
+            self._heatmap = pygame.Surface((width, screen_height), pygame.SRCALPHA)
+        self._heatmap.fill((0, 0, 0, 0))
+
+        # Count the birds in every row, birds above or below the screen are counted in the first or last row
+        rows = np.clip((np.asarray(y) + height / 2) // self.bin_size, 0, (screen_height - 1) // self.bin_size)
+        counts = np.bincount(rows.astype(np.int64))
+        highest = counts.max() if len(counts) else 0
+        for row in np.flatnonzero(counts):
+            alpha = 64 + int(191 * counts[row] / highest)
+            self._heatmap.fill(self.heatmap_color + (alpha,),
+                               (0, row * self.bin_size, self._heatmap.get_width(), self.bin_size))
+
+        screen.blit(self._heatmap, (x, 0))
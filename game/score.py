@@ -5,6 +5,7 @@
 
 
 from assets import sprites_dict
+import pygame
 
 
 class Score:
@@ -12,17 +13,17 @@ class Score:
     Score class
     For every instance of the game, there should be a single score class instance
 
-    image contains all of the pygame loaded sprites for digits 0-9
+    The digits of the score are composed into a single surface the first time the score is drawn, which is then reused
+    until the score changes. Nothing is composed until the score is drawn, so a headless game only pays for counting
     """
-    image = sprites_dict['numbers']
-
     def __init__(self):
         """
         Constructor for Score class
         """
         self._score = 0
-        self._rect = []
-        self.image = [number.convert_alpha() for number in self.image]
+        self._rect = None
+        self._surface = None
+        self._position = None
 
     # Getter & setter methods
     @property
@@ -35,36 +36,49 @@ class Score:
 
     @score.setter
     def score(self, val):
+        # Compose the score again the next time it is drawn
+        if val != self._score:
+            self._surface = None
         self._score = val
 
     @property
     def get_image(self):
         """
-        Detects the amount of digits in the score, then constructs a list containing the number sprites needed
+        Constructs a list containing the number sprite of every digit of the score
 
         :return: type: list
         List of pygame sprites of the numbers that make up the score
         """
-        if (digits := len(str(self.score))) > 1:
-            return [self.image[int(self.score_to_str[number])] for number in range(0, digits)]
+        image = sprites_dict.convert_alpha('numbers')
+
+        return [image[int(digit)] for digit in self.score_to_str]
 
-        return [self.image[self._score]]
+    def compose(self):
+        """
+        Composes the number sprites of every digit side by side into a single surface, centered horizontally on the
+        screen
+        """
+        image_list = self.get_image
+        width = sum(image.get_width() for image in image_list)
+
+        # Adding onto a fully transparent surface copies the digits as they are, without blending them twice
+        self._surface = pygame.Surface((width, max(image.get_height() for image in image_list)), pygame.SRCALPHA, 32)
+        x = 0
+        for number in image_list:
+            self._surface.blit(number, (x, 0), special_flags=pygame.BLEND_RGBA_ADD)
+            x += number.get_width()
+
+        self._position = (sprites_dict['background-day'].get_width() / 2 - width / 2,
+                          sprites_dict['background-day'].get_height() / 8)
 
     def draw_to_screen(self, screen):
         """
-        Loops the all digits of the score and draw/renders the player's score into the game screen digit by digit
+        Draw/renders the player's score into the game screen, composing the score again only if it has changed
 
         :param screen: type: pygame.surface
         The surface/screen of the game for displaying purposes
         """
-        image_list = self.get_image
-        image_width_list = [image.get_width() for image in image_list]
-        self._rect = []
-
-        for index, number in enumerate(image_list, start=0):
-            self._rect.append(screen.blit(number,
-                                          ((sprites_dict['background-day'].get_width() / 2 - sum(
-                                              image_width_list) / 2) + sum(image_width_list[0:index]),
-                                           sprites_dict['background-day'].get_height() / 8
-                                           ))
-                              )
+        if self._surface is None:
+            self.compose()
+
+        self._rect = screen.blit(self._surface, self._position)
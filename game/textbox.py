@@ -5,14 +5,28 @@
     https://www.pygame.org/docs/ref/font.html
 """
 
+from collections import OrderedDict
 import pygame
+import os
 from game.color import color_to_rgb
 
+# Directory of the custom fonts, so the fonts are found regardless of the working directory
+FONT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+
 
 class Textbox:
     """
     Pygame.font object adapted into a class for standardisation within the script
+
+    font_cache holds every loaded font keyed by (font name, font size), shared by every textbox of the process
+    text_cache holds the most recently rendered text surfaces keyed by (text, color, font name, font size), the least
+    recently used surface is dropped once there are more than text_cache_size surfaces
+    So redrawing an unchanged text costs a single blit instead of loading a font & rendering the text
     """
+    font_cache = {}
+    text_cache = OrderedDict()
+    text_cache_size = 512
+
     def __init__(self, text_color, font_name, font_size, center_x=None, center_y=None):
         """
         Constructor for the Textbox class
@@ -66,36 +80,64 @@ class Textbox:
     def center_y(self, val):
         self._center_y = val
 
+    @classmethod
+    def clear_font_cache(cls):
+        """
+        Drops every loaded font, fonts can not be used anymore once pygame quits
+        """
+        cls.font_cache.clear()
+
     def load_font(self):
         """
         Detects if the font is supported in pygame.font library. If supported, directly load the font from the library
         else, load the font from a external directory
+        The font is only loaded the first time it is used, then looked up from the font cache
 
         :return: type: pygame.font.Font
         The loaded font object
         """
+        key = (self._font_name, self._font_size)
+        if key in self.font_cache:
+            return self.font_cache[key]
+
+        # Drop the loaded fonts when pygame quits, registered again once the cache is refilled
+        if not self.font_cache:
+            pygame.register_quit(Textbox.clear_font_cache)
 
         # Font handler
         # Check if custom font or system font
         if self._font_name not in pygame.font.get_fonts():
             # Load custom font from file
-            font = pygame.font.Font("fonts/{}.ttf".format(self._font_name), self._font_size)
+            font = pygame.font.Font(os.path.join(FONT_PATH, "{}.ttf".format(self._font_name)), self._font_size)
         else:
             # Load system font
             font = pygame.font.SysFont(self._font_name, self._font_size)
 
+        self.font_cache[key] = font
+
         return font
 
     def create_textbox(self):
         """
         Render the textbox with all provided configurations onto a new surface
+        The surface is only rendered the first time the text is used, then looked up from the text cache
 
         :return: type: pygame.surface
         pygame.surface that contains the rendered textbox
         """
+        key = (self._text, self._text_color, self._font_name, self._font_size)
+        text = self.text_cache.get(key)
 
-        # Render text on new surface
-        text = self.load_font().render(self._text, True, self._text_color)
+        if text is None:
+            # Render text on new surface
+            text = self.load_font().render(self._text, True, self._text_color)
+            self.text_cache[key] = text
+
+            # Drop least recently used text
+            if len(self.text_cache) > self.text_cache_size:
+                self.text_cache.popitem(last=False)
+        else:
+            self.text_cache.move_to_end(key)
 
         return text
 
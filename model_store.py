@@ -0,0 +1,206 @@
+"""
+    Model store module used to save trained genomes with their metadata and select them without loading every genome
+"""
+
+import datetime
+import tempfile
+import hashlib
+import pickle
+import json
+import os
+
+
+def config_hash(path):
+    """
+    Hashes the content of a NEAT configuration file, models trained with the same configuration have the same hash
+
+    :param path: type: str
+    Path of the NEAT configuration file
+
+    :return: type: str
+    The first 12 characters of the SHA-256 hex digest of the file
+    """
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()[:12]
+
+
+class ModelStore:
+    """
+    Directory of pickled genomes along with an index file holding the metadata of every model
+    The metadata (File, fitness, configuration hash, seed, creation time, size, number of nodes & connections) is read
+    from the index only, a genome is only unpickled once it is loaded
+
+    Every model is saved into its own file so that models with the same fitness never overwrite each other
+    Pickled genomes found in the directory but missing from the index (e.g. copied into the directory by hand) are
+    added to the index the first time the store is opened, which is the only time they are unpickled for their metadata
+    """
+    index_name = "index.json"
+
+    def __init__(self, directory="models"):
+        """
+        Constructor for the ModelStore class
+
+        :param directory: type: str
+        Directory the models & index are saved into
+        """
+        self._directory = directory
+        self._models = []
+
+        # Read the index, then add any model missing from it
+        path = os.path.join(directory, self.index_name)
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                self._models = json.load(file)["models"]
+        self.sync()
+
+    # Getter & setter methods
+    @property
+    def directory(self):
+        return self._directory
+
+    def __len__(self):
+        return len(self._models)
+
+    def _write_index(self):
+        """
+        Writes the index to a temporary file that then replaces the index, so the index is never left half written
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=self._directory, suffix=".tmp", delete=False) as file:
+            json.dump({"models": self._models}, file, indent=4)
+        os.replace(file.name, os.path.join(self._directory, self.index_name))
+
+    def _add(self, name, genome, config=None, seed=None):
+        """
+        Adds the metadata of a genome saved in the directory to the index, without writing the index
+
+        :param name: type: str
+        File name of the pickled genome in the directory
+
+        :param genome: type: neat.DefaultGenome
+        The genome
+
+        :param config: type: str
+        Configuration hash of the genome, None if unknown
+
+        :param seed: type: int
+        Seed of the training run of the genome, None if unknown
+
+        :return: type: dict
+        The metadata of the model
+        """
+        path = os.path.join(self._directory, name)
+        model = {
+            "file": name,
+            "fitness": genome.fitness,
+            "config_hash": config,
+            "seed": seed,
+            "created": datetime.datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds'),
+            "size": os.path.getsize(path),
+            "nodes": len(genome.nodes),
+            "connections": sum(connection.enabled for connection in genome.connections.values())
+        }
+        self._models.append(model)
+
+        return model
+
+    def sync(self):
+        """
+        Adds pickled genomes missing from the index & drops models whose file no longer exists
+        """
+        if not os.path.isdir(self._directory):
+            return
+
+        names = set(name for name in os.listdir(self._directory) if name.endswith(".pkl"))
+        indexed = set(model["file"] for model in self._models)
+
+        # Drop deleted models
+        models = [model for model in self._models if model["file"] in names]
+        changed = len(models) != len(self._models)
+        self._models = models
+
+        # Add models missing from the index, ordered by name so that the index is the same on every machine
+        for name in sorted(names - indexed):
+            print("Indexing model {}...".format(name))
+            self._add(name, self.load(name))
+            changed = True
+
+        if changed:
+            self._write_index()
+
+    def save(self, genome, config=None, seed=None, prefix="winner"):
+        """
+        Saves a genome into its own file & adds its metadata to the index
+
+        :param genome: type: neat.DefaultGenome
+        The genome to save
+
+        :param config: type: str
+        Configuration hash of the genome, see config_hash
+
+        :param seed: type: int
+        Seed of the training run of the genome
+
+        :param prefix: type: str
+        Prefix of the file name, followed by the fitness & a number making the name unique
+
+        :return: type: dict
+        The metadata of the model
+        """
+        os.makedirs(self._directory, exist_ok=True)
+
+        # Pick a name not used by any other model
+        name = "{}-{:.0f}.pkl".format(prefix, genome.fitness)
+        number = 1
+        while os.path.exists(os.path.join(self._directory, name)):
+            number += 1
+            name = "{}-{:.0f}-{}.pkl".format(prefix, genome.fitness, number)
+
+        with open(os.path.join(self._directory, name), 'wb') as data:
+            pickle.dump(genome, data, protocol=pickle.HIGHEST_PROTOCOL)
+
+        model = self._add(name, genome, config, seed)
+        self._write_index()
+
+        return model
+
+    def query(self, min_fitness=None, config=None, seed=None, top=None):
+        """
+        Selects models by their metadata, sorted from the highest fitness
+
+        :param min_fitness: type: float
+        Lowest fitness of the selected models
+
+        :param config: type: str
+        Configuration hash of the selected models
+
+        :param seed: type: int
+        Seed of the training run of the selected models
+
+        :param top: type: int
+        Maximum number of models selected
+
+        :return: type: list
+        List containing the metadata of the selected models
+        """
+        models = [model for model in self._models
+                  if (min_fitness is None or model["fitness"] >= min_fitness) and
+                  (config is None or model["config_hash"] == config) and
+                  (seed is None or model["seed"] == seed)]
+        models.sort(key=lambda model: -model["fitness"])
+
+        return models[:top] if top is not None else models
+
+    def load(self, model):
+        """
+        Unpickles the genome of a model
+
+        :param model: type: dict or str
+        The metadata of the model, or the file name of the model
+
+        :return: type: neat.DefaultGenome
+        The genome of the model
+        """
+        name = model["file"] if isinstance(model, dict) else model
+        with open(os.path.join(self._directory, name), 'rb') as data:
+            return pickle.load(data)
@@ -0,0 +1,227 @@
+"""
+    NEAT network module used to evaluate the networks of a whole population at once
+"""
+
+from collections import OrderedDict
+import neat
+import numpy as np
+
+
+class BatchedNetwork:
+    """
+    The feed forward networks of a population compiled into padded NumPy arrays, so that every network is activated in
+    a single batched forward pass instead of node by node through neat.nn.FeedForwardNetwork.activate
+
+    The nodes of every network are grouped into topological layers, a node is placed one layer after the deepest node
+    it receives a connection from. Each layer is then stored as padded arrays of shape (networks, nodes) for the target
+    node, bias & response and (networks, nodes, links) for the source node & weight of every incoming connection.
+    Padding nodes write into a dump column and padding links read from a zero column, so they never affect the result
+
+    The weighted inputs of a node are summed in the same order as neat-python does, and tanh is applied the same way as
+    neat.activations.tanh_activation, NumPy's tanh may only differ from math.tanh in the last bit of the result
+    Only the sum aggregation & tanh activation functions are supported
+    """
+    def __init__(self, networks):
+        """
+        Constructor for the BatchedNetwork class
+
+        :param networks: type: list
+        List containing the neat.nn.FeedForwardNetwork of every bird
+        """
+        input_nodes = networks[0].input_nodes if networks else []
+        output_nodes = networks[0].output_nodes if networks else []
+
+        # Value columns, inputs first then a zero column, a dump column, the outputs & finally the hidden nodes
+        self._zero_column = len(input_nodes)
+        self._dump_column = self._zero_column + 1
+        self._output_columns = [self._dump_column + 1 + index for index in range(len(output_nodes))]
+        first_hidden_column = self._dump_column + 1 + len(output_nodes)
+
+        # Layer & value column of every node, per network
+        network_layers = []
+        columns = first_hidden_column
+        for network in networks:
+            column = dict((node, index) for index, node in enumerate(input_nodes))
+            column.update(zip(output_nodes, self._output_columns))
+            depth = dict((node, 0) for node in input_nodes)
+            next_column = first_hidden_column
+            layers = []
+
+            for node, act_func, agg_func, bias, response, links in network.node_evals:
+                if act_func is not neat.activations.tanh_activation or \
+                        agg_func is not neat.aggregations.sum_aggregation:
+                    raise ValueError("Only the tanh activation & sum aggregation functions can be batched")
+
+                # Place node one layer after the deepest node it is connected from
+                depth[node] = 1 + max(depth[source] for source, weight in links)
+                if depth[node] > len(layers):
+                    layers.append([])
+
+                if node not in column:
+                    column[node] = next_column
+                    next_column += 1
+                layers[depth[node] - 1].append((column[node], bias, response,
+                                                [(column[source], weight) for source, weight in links]))
+
+            network_layers.append(layers)
+            columns = max(columns, next_column)
+
+        # Pad every layer to the widest layer & largest number of incoming connections in the population
+        self._layers = []
+        for depth in range(max((len(layers) for layers in network_layers), default=0)):
+            layer = [layers[depth] if depth < len(layers) else [] for layers in network_layers]
+            width = max(len(nodes) for nodes in layer)
+            links = max((len(node[3]) for nodes in layer for node in nodes), default=0)
+
+            target = np.full((len(networks), width), self._dump_column, dtype=np.int64)
+            bias = np.zeros((len(networks), width), dtype=np.float64)
+            response = np.zeros((len(networks), width), dtype=np.float64)
+            source = np.full((len(networks), width, links), self._zero_column, dtype=np.int64)
+            weight = np.zeros((len(networks), width, links), dtype=np.float64)
+
+            for row, nodes in enumerate(layer):
+                for index, (node_column, node_bias, node_response, node_links) in enumerate(nodes):
+                    target[row, index] = node_column
+                    bias[row, index] = node_bias
+                    response[row, index] = node_response
+                    for link, (source_column, link_weight) in enumerate(node_links):
+                        source[row, index, link] = source_column
+                        weight[row, index, link] = link_weight
+
+            self._layers.append((target, bias, response, source, weight))
+
+        self._values = np.zeros((len(networks), columns), dtype=np.float64)
+
+    # Getter & setter methods
+    @property
+    def size(self):
+        return len(self._values)
+
+    def activate(self, inputs):
+        """
+        Runs a single forward pass of every network
+
+        :param inputs: type: numpy.ndarray
+        Array of shape (networks, inputs) containing the inputs of every network
+
+        :return: type: numpy.ndarray
+        Array of shape (networks, outputs) containing the outputs of every network
+        """
+        values = self._values
+        rows = np.arange(len(values))[:, np.newaxis]
+        values[:, :self._zero_column] = inputs
+
+        for target, bias, response, source, weight in self._layers:
+            # Sum the weighted inputs of every node in the same order as neat-python
+            total = np.zeros(target.shape, dtype=np.float64)
+            for link in range(source.shape[2]):
+                total += values[rows, source[:, :, link]] * weight[:, :, link]
+
+            # Same as neat.activations.tanh_activation
+            values[rows, target] = np.tanh(np.clip(2.5 * (bias + response * total), -60.0, 60.0))
+
+        return values[:, self._output_columns]
+
+    def compact(self, survivors):
+        """
+        Keeps only the networks at the indexes, used alongside Flock.compact when birds are removed
+
+        :param survivors: type: numpy.ndarray
+        Indexes of the networks to keep
+        """
+        self._layers = [tuple(array[survivors] for array in layer) for layer in self._layers]
+        self._values = self._values[survivors]
+
+
+class NetworkCache:
+    """
+    Least recently used cache of neat.nn.FeedForwardNetwork keyed by the structure & weights of the genome
+    Genomes carried over to the next generation unchanged (Elites) skip creating their network again
+
+    The key of a genome is made from every node (key, bias, response, activation & aggregation) and every connection
+    (key, weight & enabled), so any mutation of the genome results in a different key
+    """
+    def __init__(self, max_size=1024):
+        """
+        Constructor for the NetworkCache class
+
+        :param max_size: type: int
+        Maximum number of networks kept, the least recently used network is dropped once exceeded
+        """
+        self._max_size = max_size
+        self._networks = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    # Getter & setter methods
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def __len__(self):
+        return len(self._networks)
+
+    @staticmethod
+    def genome_key(genome):
+        """
+        Creates the cache key of the genome from its nodes & connections
+
+        :param genome: type: neat.DefaultGenome
+        The genome of the network
+
+        :return: type: tuple
+        The hashable key of the genome
+        """
+        nodes = tuple(sorted((node.key, node.bias, node.response, node.activation, node.aggregation)
+                             for node in genome.nodes.values()))
+        connections = tuple(sorted((connection.key, connection.weight, connection.enabled)
+                                   for connection in genome.connections.values()))
+
+        return nodes, connections
+
+    def create(self, genome, config):
+        """
+        Returns the cached network of the genome, or creates & caches it if the genome has not been seen before
+
+        :param genome: type: neat.DefaultGenome
+        The genome of the network
+
+        :param config: type: neat.config.Config
+        The NEAT configuration file object
+
+        :return: type: neat.nn.FeedForwardNetwork
+        The network of the genome
+        """
+        key = self.genome_key(genome)
+
+        if key in self._networks:
+            self._hits += 1
+            self._networks.move_to_end(key)
+            return self._networks[key]
+
+        self._misses += 1
+        network = neat.nn.FeedForwardNetwork.create(genome, config)
+        self._networks[key] = network
+
+        # Drop least recently used network
+        if len(self._networks) > self._max_size:
+            self._networks.popitem(last=False)
+
+        return network
+
+    def add_counts(self, hits, misses):
+        """
+        Adds hit & miss counts from another cache, used to total up the caches of worker processes
+
+        :param hits: type: int
+        Number of cache hits to add
+
+        :param misses: type: int
+        Number of cache misses to add
+        """
+        self._hits += hits
+        self._misses += misses
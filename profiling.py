@@ -0,0 +1,148 @@
+"""
+    Profiling module used to measure where the time of the game loop goes, phase by phase
+"""
+
+from tabulate import tabulate
+import neat
+import time
+
+
+class PhaseProfiler:
+    """
+    Records the time spent in every phase of the game loop (Rendering, network activation, collision detection, etc.)
+
+    The game loop calls start_frame at the beginning of every frame and mark right after every phase, the time since
+    the previous call is added to the phase that was just marked, so a single clock read is needed per phase
+    A disabled profiler returns straight away from every call, so it can be left in the game loop at all times
+    """
+    def __init__(self, enabled=True):
+        """
+        Constructor for the PhaseProfiler class
+
+        :param enabled: type: bool
+        If False, nothing is recorded
+        """
+        self.enabled = enabled
+        self._last = 0
+        self._frames = 0
+        self._phases = {}
+
+    # Getter & setter methods
+    @property
+    def frames(self):
+        return self._frames
+
+    def start_frame(self):
+        """
+        Counts a new frame and starts timing its first phase
+        """
+        if not self.enabled:
+            return
+
+        self._frames += 1
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """
+        Adds the time since the previous mark, or the start of the frame, to the phase
+
+        :param phase: type: str
+        Name of the phase that just ended
+        """
+        if not self.enabled:
+            return
+
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+
+        # Phase statistics are [cumulative time, longest time]
+        statistics = self._phases.get(phase)
+        if statistics is None:
+            self._phases[phase] = [elapsed, elapsed]
+        else:
+            statistics[0] += elapsed
+            if elapsed > statistics[1]:
+                statistics[1] = elapsed
+
+    def state(self):
+        """
+        Returns the recorded frames & phase statistics, used to send the statistics of a worker process back to the
+        main process
+
+        :return: type: tuple
+        Tuple containing the number of frames and a dictionary of the [cumulative time, longest time] of every phase
+        """
+        return self._frames, dict((phase, list(statistics)) for phase, statistics in self._phases.items())
+
+    def merge(self, state):
+        """
+        Adds the recorded frames & phase statistics of another profiler
+
+        :param state: type: tuple
+        The state of the other profiler
+        """
+        frames, phases = state
+        self._frames += frames
+        for phase, (total, longest) in phases.items():
+            statistics = self._phases.setdefault(phase, [0, 0])
+            statistics[0] += total
+            statistics[1] = max(statistics[1], longest)
+
+    def reset(self):
+        """
+        Clears every recorded frame & phase
+        """
+        self._frames = 0
+        self._phases = {}
+
+    def summary(self):
+        """
+        Summarizes the recorded phases, sorted from the most time consuming phase
+
+        :return: type: list
+        List containing a dictionary of the cumulative time, average time per frame, longest time & share of the total
+        time of every phase
+        """
+        total = sum(statistics[0] for statistics in self._phases.values())
+
+        return [{"phase": phase,
+                 "total (s)": cumulative,
+                 "per frame (ms)": 1000 * cumulative / max(self._frames, 1),
+                 "longest (ms)": 1000 * longest,
+                 "share (%)": 100 * cumulative / total if total else 0}
+                for phase, (cumulative, longest) in sorted(self._phases.items(), key=lambda item: -item[1][0])]
+
+    def print_summary(self, title="Game loop profile"):
+        """
+        Prints the summary in table format
+
+        :param title: type: str
+        Title printed above the table
+        """
+        if not self.enabled or not self._frames:
+            return
+
+        print("\n{} ({} frames)".format(title, self._frames))
+        print(tabulate(self.summary(), headers="keys", floatfmt=".3f"))
+
+
+class ProfilerReporter(neat.reporting.BaseReporter):
+    """
+    NEAT reporter printing the game loop profile of every generation, then starting over for the next generation
+    """
+    def __init__(self, profiler):
+        """
+        Constructor for the ProfilerReporter class
+
+        :param profiler: type: PhaseProfiler
+        The profiler of the game loop
+        """
+        self._profiler = profiler
+
+    def post_evaluate(self, config, population, species, best_genome):
+        """
+        Prints the game loop profile of the generation that was just evaluated
+        """
+        self._profiler.print_summary("Game loop profile of {} birds".format(len(population)))
+        self._profiler.reset()
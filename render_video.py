@@ -0,0 +1,193 @@
+"""
+    Renders a recorded run, or a model playing a seeded pipe course, into an image sequence or a video without a window
+
+    Frames are drawn offscreen through the SDL dummy video driver by the same game loop & draw_to_screen methods as
+    training, without a frame cap, so a run is rendered faster than real time
+    Frames are encoded by separate processes fed through a bounded queue, so compressing the images never holds up the
+    simulation, and the simulation waits for the encoders instead of piling up frames in memory if they fall behind
+    Images are independent of each other so an image sequence is encoded by several processes at once, a video is
+    encoded by a single process piping the frames into ffmpeg in order
+"""
+
+import os
+
+# Render offscreen, no window is ever created
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from game.course import Course
+from model_store import ModelStore
+
+import multiprocessing
+import subprocess
+import argparse
+import shutil
+import pygame
+import neat
+import time
+import replay
+import train
+
+# Global variables
+VIDEO_EXTENSIONS = [".mp4", ".mkv", ".webm", ".avi", ".mov"]
+QUEUE_SIZE = 64
+
+
+def is_video(output):
+    """
+    Checks if the output is a video file rather than a directory of images
+
+    :param output: type: str
+    Path of the output
+
+    :return: type: bool
+    True if the output has a video file extension, else False
+    """
+    return os.path.splitext(output)[1].lower() in VIDEO_EXTENSIONS
+
+
+def encode_frames(frames, output, size, fps):
+    """
+    Encodes every frame received from the queue until None is received, runs in an encoding process
+    Videos are encoded by piping the raw frames into ffmpeg, image sequences are saved as numbered PNG files
+
+    :param frames: type: multiprocessing.Queue
+    Queue of the (frame number, raw RGB bytes) tuple of every frame, followed by None
+
+    :param output: type: str
+    Path of the video file, or of the directory the images are saved into
+
+    :param size: type: tuple
+    Width & height of the frames in pixels
+
+    :param fps: type: int
+    Frames per second of the video
+    """
+    if is_video(output):
+        encoder = subprocess.Popen(["ffmpeg", "-y", "-loglevel", "error",
+                                    "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", "{}x{}".format(*size),
+                                    "-r", str(fps), "-i", "-", "-pix_fmt", "yuv420p", output],
+                                   stdin=subprocess.PIPE)
+        for index, frame in iter(frames.get, None):
+            encoder.stdin.write(frame)
+        encoder.stdin.close()
+        encoder.wait()
+    else:
+        os.makedirs(output, exist_ok=True)
+        for index, frame in iter(frames.get, None):
+            pygame.image.save(pygame.image.fromstring(frame, size, "RGB"),
+                              os.path.join(output, "frame-{:06d}.png".format(index)))
+
+
+class VideoWriter:
+    """
+    Sends the frames drawn by the game loop to the encoding processes
+    Used as the on_frame function of train.play_game, the encoding processes are started straight away so that they
+    are started before pygame is initialized
+    """
+    def __init__(self, output, size, fps=30, encoders=1):
+        """
+        Constructor for the VideoWriter class
+
+        :param output: type: str
+        Path of the video file, or of the directory the images are saved into
+
+        :param size: type: tuple
+        Width & height of the frames in pixels
+
+        :param fps: type: int
+        Frames per second of the video
+
+        :param encoders: type: int
+        Number of encoding processes of an image sequence, a video is always encoded by a single process
+        """
+        if is_video(output) and shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg is needed to encode {}, install it or render an image sequence instead"
+                               .format(output))
+
+        self._frames = multiprocessing.Queue(QUEUE_SIZE)
+        self._processes = [multiprocessing.Process(target=encode_frames, args=(self._frames, output, size, fps))
+                           for _ in range(1 if is_video(output) else encoders)]
+        for process in self._processes:
+            process.start()
+        self._count = 0
+
+    # Getter & setter methods
+    @property
+    def count(self):
+        return self._count
+
+    def __call__(self, screen):
+        """
+        Copies the frame out of the screen & queues it for encoding
+
+        :param screen: type: pygame.surface
+        The surface/screen of the game the frame was drawn to
+        """
+        self._frames.put((self._count, pygame.image.tostring(screen, "RGB")))
+        self._count += 1
+
+    def close(self):
+        """
+        Waits for the encoding processes to encode every queued frame
+        """
+        for _ in self._processes:
+            self._frames.put(None)
+        for process in self._processes:
+            process.join()
+        self._processes = []
+
+
+if __name__ == '__main__':
+    """
+    Rendering a run
+
+    What it does:
+        1. Parse command line options
+        2. Play the recorded run back, or the model on the seeded pipe course, drawing every frame offscreen
+        3. Encode every frame in a separate process into the image sequence or video
+    """
+    # Parse command line options
+    parser = argparse.ArgumentParser(description="Render a Flappy bird run into an image sequence or video")
+    parser.add_argument("output",
+                        help="Video file ({}) or directory the PNG frames are saved into".format(
+                            ", ".join(VIDEO_EXTENSIONS)))
+    parser.add_argument("--replay", default=None,
+                        help="Replay file of the run, see train.py --record-dir")
+    parser.add_argument("--model", default=None,
+                        help="File name of a model in the models directory, played on the course of --seed")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the pipe course the model is played on")
+    parser.add_argument("--max-steps", type=int, default=5000,
+                        help="Maximum number of frames the model is played for")
+    parser.add_argument("--decision-interval", type=int, default=1,
+                        help="Query the model every this many frames, repeating the last action in between")
+    parser.add_argument("--fps", type=int, default=train.FPS,
+                        help="Frames per second of the video")
+    parser.add_argument("--encoders", type=int, default=multiprocessing.cpu_count(),
+                        help="Number of processes encoding the frames of an image sequence")
+    args = parser.parse_args()
+    if (args.replay is None) == (args.model is None):
+        parser.error("exactly one of --replay or --model is required")
+    if args.decision_interval < 1:
+        parser.error("--decision-interval must be at least 1")
+
+    # Draw as fast as possible
+    train.FPS = 0
+    writer = VideoWriter(args.output, (train.DISPLAY_WIDTH, train.DISPLAY_HEIGHT), args.fps, args.encoders)
+
+    start = time.perf_counter()
+    if args.replay is not None:
+        replay.play(replay.Replay.load(args.replay), False, writer)
+    else:
+        config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                                    neat.DefaultStagnation, 'neat-config.ini')
+        genome = ModelStore("models").load(args.model)
+        train.play_game([(genome.key, genome)], config, Course(args.seed), False,
+                        train.GenerationLimits(max_steps=args.max_steps), args.decision_interval, on_frame=writer)
+    simulated = time.perf_counter() - start
+    writer.close()
+    elapsed = time.perf_counter() - start
+
+    print("Rendered {} frames ({:.1f}s of video) in {:.1f}s, simulated in {:.1f}s, {:.1f}x real time".format(
+        writer.count, writer.count / args.fps, elapsed, simulated, writer.count / args.fps / max(elapsed, 1e-9)))
+    print("Saved to {}".format(args.output))
@@ -0,0 +1,298 @@
+"""
+    Replay module used to record the flaps of every bird of a game into a small binary file & play the game back from it
+
+    A replay only holds the seed of the pipe course and whether every bird flapped on every frame, packed 8 frames per
+    byte, the game being deterministic for a given course & sequence of flaps. The networks are never needed to play a
+    replay back, so the best run of every generation can be kept & watched again without simulating the population
+"""
+
+import argparse
+import struct
+import gzip
+import neat
+import numpy as np
+
+
+class Recorder:
+    """
+    Records the flaps of every bird of a game, one row of bits per frame
+    Used alongside the flock, the recorder is compacted with the flock so that the flaps of the surviving birds are
+    always recorded at the column of their genome
+    """
+    def __init__(self, genomes, seed, generation=None):
+        """
+        Constructor for the Recorder class
+
+        :param genomes: type: list
+        List containing the (genome_id, genome) tuple of every bird, in the order of the flock
+
+        :param seed: type: int
+        Seed of the pipe course of the game
+
+        :param generation: type: int
+        Generation the game is played for, None if unknown
+        """
+        self._genome_ids = [genome_id for genome_id, genome in genomes]
+        self._seed = seed
+        self._generation = generation
+        self._positions = np.arange(len(genomes))
+        self._lengths = np.zeros(len(genomes), dtype=np.int64)
+        self._rows = []
+
+    # Getter & setter methods
+    @property
+    def frames(self):
+        return len(self._rows)
+
+    def record(self, jump):
+        """
+        Records the flaps of the surviving birds for the current frame
+
+        :param jump: type: numpy.ndarray
+        Boolean array the size of the flock, True for birds that are jumping/flapping this frame
+        """
+        row = np.zeros(len(self._genome_ids), dtype=bool)
+        row[self._positions] = jump
+        self._rows.append(np.packbits(row))
+        self._lengths[self._positions] += 1
+
+    def compact(self, survivors):
+        """
+        Keeps recording only the birds at the indexes, used alongside Flock.compact when birds are removed
+
+        :param survivors: type: numpy.ndarray
+        Indexes of the birds to keep
+        """
+        self._positions = self._positions[survivors]
+
+    def replay(self, genomes):
+        """
+        Extracts the recorded flaps of some of the birds into a replay
+
+        :param genomes: type: list
+        List containing the (genome_id, genome) tuple of the birds to keep
+        The fitness of the genomes is stored in the replay to be compared against when playing it back
+
+        :return: type: Replay
+        The replay of the birds
+        """
+        positions = dict((genome_id, position) for position, genome_id in enumerate(self._genome_ids))
+        rows = np.array(self._rows, dtype=np.uint8).reshape(len(self._rows), (len(self._genome_ids) + 7) // 8)
+
+        birds = []
+        for genome_id, genome in genomes:
+            position = positions[genome_id]
+            length = self._lengths[position]
+
+            # Read the bit of the bird out of every row
+            flaps = (rows[:length, position // 8] >> (7 - position % 8)) & 1
+            birds.append((genome_id, genome.fitness, int(length), np.packbits(flaps.astype(bool)).tobytes()))
+
+        return Replay(self._seed, self._generation, birds)
+
+
+class Replay:
+    """
+    The pipe course seed and the packed flaps of every bird of a recorded game
+
+    The file is gzip compressed & made of a header followed by every bird:
+        1. Header, magic bytes, format version, course seed, generation (-1 if unknown) & number of birds
+        2. Bird, genome id, recorded fitness, number of frames the bird was alive for & its flaps packed 8 per byte
+    """
+    magic = b"FBRP"
+    version = 1
+    header_format = "<4sBqiI"
+    bird_format = "<qdI"
+
+    def __init__(self, seed, generation, birds):
+        """
+        Constructor for the Replay class
+
+        :param seed: type: int
+        Seed of the pipe course of the game
+
+        :param generation: type: int
+        Generation the game was played for, None if unknown
+
+        :param birds: type: list
+        List containing the (genome_id, fitness, frames, packed flaps) tuple of every bird
+        """
+        self._seed = seed
+        self._generation = generation
+        self._birds = birds
+
+    # Getter & setter methods
+    @property
+    def seed(self):
+        return self._seed
+
+    @property
+    def generation(self):
+        return self._generation
+
+    @property
+    def birds(self):
+        return self._birds
+
+    @property
+    def frames(self):
+        return max((frames for genome_id, fitness, frames, flaps in self._birds), default=0)
+
+    def save(self, path):
+        """
+        Writes the replay into a file
+
+        :param path: type: str
+        Path of the replay file
+        """
+        generation = -1 if self._generation is None else self._generation
+        with gzip.open(path, 'wb', compresslevel=9) as file:
+            file.write(struct.pack(self.header_format, self.magic, self.version, self._seed, generation,
+                                   len(self._birds)))
+            for genome_id, fitness, frames, flaps in self._birds:
+                file.write(struct.pack(self.bird_format, genome_id, fitness, frames))
+                file.write(flaps)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a replay from a file
+
+        :param path: type: str
+        Path of the replay file
+
+        :return: type: Replay
+        The replay
+        """
+        with gzip.open(path, 'rb') as file:
+            magic, version, seed, generation, count = struct.unpack(cls.header_format,
+                                                                    file.read(struct.calcsize(cls.header_format)))
+            if magic != cls.magic or version != cls.version:
+                raise ValueError("{} is not a version {} replay file".format(path, cls.version))
+
+            birds = []
+            for _ in range(count):
+                genome_id, fitness, frames = struct.unpack(cls.bird_format, file.read(struct.calcsize(cls.bird_format)))
+                birds.append((genome_id, fitness, frames, file.read((frames + 7) // 8)))
+
+        return cls(seed, None if generation < 0 else generation, birds)
+
+    def genomes(self):
+        """
+        Creates an empty genome for every bird, the game only needs somewhere to record the fitness into
+
+        :return: type: list
+        List containing the (genome_id, genome) tuple of every bird
+        """
+        return [(genome_id, neat.DefaultGenome(genome_id)) for genome_id, fitness, frames, flaps in self._birds]
+
+    def network(self):
+        """
+        Creates the network flapping every bird the same as recorded
+
+        :return: type: ReplayNetwork
+        The network of every bird
+        """
+        return ReplayNetwork(self)
+
+
+class ReplayNetwork:
+    """
+    Stand-in for BatchedNetwork that outputs the recorded flap of every bird instead of activating a network
+    Activated exactly once per frame, so the replay has to be played with a decision interval of 1, the recorded flaps
+    already repeat the last action in between decisions
+    """
+    def __init__(self, replay):
+        """
+        Constructor for the ReplayNetwork class
+
+        :param replay: type: Replay
+        The replay to play back
+        """
+        # Unpack the flaps of every bird into a (birds, frames) array, padded with no flaps
+        self._flaps = np.zeros((len(replay.birds), replay.frames + 1), dtype=bool)
+        for index, (genome_id, fitness, frames, flaps) in enumerate(replay.birds):
+            self._flaps[index, :frames] = np.unpackbits(np.frombuffer(flaps, dtype=np.uint8), count=frames)
+        self._positions = np.arange(len(replay.birds))
+        self._frame = 0
+
+    # Getter & setter methods
+    @property
+    def size(self):
+        return len(self._positions)
+
+    def activate(self, inputs):
+        """
+        Outputs the recorded flaps of the surviving birds for the current frame, then moves on to the next frame
+
+        :param inputs: type: numpy.ndarray
+        Array of shape (birds, inputs) containing the inputs of every network, ignored
+
+        :return: type: numpy.ndarray
+        Array of shape (birds, 1) containing 1 for birds that flapped on the frame, else 0
+        """
+        frame = min(self._frame, self._flaps.shape[1] - 1)
+        self._frame += 1
+
+        return self._flaps[self._positions, frame].astype(np.float64)[:, np.newaxis]
+
+    def compact(self, survivors):
+        """
+        Keeps only the birds at the indexes, used alongside Flock.compact when birds are removed
+
+        :param survivors: type: numpy.ndarray
+        Indexes of the birds to keep
+        """
+        self._positions = self._positions[survivors]
+
+
+def play(replay, headless, on_frame=None):
+    """
+    Plays a replay back and records the fitness of every bird into its genome
+
+    :param replay: type: Replay
+    The replay to play back
+
+    :param headless: type: bool
+    If True, the game is only simulated, else it is played on screen
+
+    :param on_frame: type: function
+    If provided and not headless, called with the screen after every frame is drawn
+
+    :return: type: list
+    List containing the (genome_id, genome) tuple of every bird
+    """
+    # Imported here since the training script imports this module to record the games
+    import train
+    from game.course import Course
+
+    genomes = replay.genomes()
+    train.play_game(genomes, None, Course(replay.seed), headless, train.GenerationLimits(max_steps=replay.frames),
+                    networks=replay.network(), generation=replay.generation, on_frame=on_frame)
+
+    return genomes
+
+
+if __name__ == '__main__':
+    """
+    Playing a replay back
+
+    What it does:
+        1. Parse command line options & load the replay
+        2. Play the replay back, on screen or headless
+        3. Print the recorded & replayed fitness of every bird
+    """
+    # Parse command line options
+    parser = argparse.ArgumentParser(description="Play back a recorded Flappy bird game")
+    parser.add_argument("path",
+                        help="Replay file, see train.py --record-dir")
+    parser.add_argument("--headless", action="store_true",
+                        help="Only simulate the game and print the fitness of every bird")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    print("Replaying {} birds for {} frames on course {}".format(len(replay.birds), replay.frames, replay.seed))
+    genomes = play(replay, args.headless)
+
+    for (genome_id, genome), (recorded_id, fitness, frames, flaps) in zip(genomes, replay.birds):
+        print("Genome {}: recorded fitness {:.1f}, replayed fitness {:.1f}".format(genome_id, fitness, genome.fitness))
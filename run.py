@@ -5,23 +5,31 @@
 from assets import sprites_dict
 from game.base import Base
 from game.bird import Bird
+from game.course import Course
+from game.dirty_screen import DirtyScreen
 from game.pipe import Pipe
 from game.score import Score
+from profiling import PhaseProfiler
 
 import pygame
 import sys
 import math
+import argparse
 
 # Global variables
 DISPLAY_WIDTH = sprites_dict['background-day'].get_width()
 DISPLAY_HEIGHT = sprites_dict['background-day'].get_height()
 FPS = 30
 
+# Time spent in every phase of the game loop, only recorded when enabled
+profiler = PhaseProfiler(enabled=False)
+
 
 def quit_game():
     """
-    Exits the pygame window and stops the script
+    Exits the pygame window and stops the script, printing the game loop profile if enabled
     """
+    profiler.print_summary()
 
     # Exit pygame window
     pygame.quit()
@@ -70,7 +78,7 @@ def pipes_animation_handler(pipe_list):
     """
     Moves both pipe objects simultaneously
     When any one of the pipe have move beyond the left side of the screen, reset the position of the base back at the
-    end of the other pipe with added interval width
+    end of the other pipe with added interval width, as the next pipe of the course
 
     Note: A single pipe object contains 2 pipes, the upper & lower pipe sprite
 
@@ -85,9 +93,7 @@ def pipes_animation_handler(pipe_list):
         # Check if any pipe has exited the left side of the screen
         # If true, place pipe back to the right side with added interval width
         if pipe.x + sprites_dict['pipe-green'].get_width() <= 0:
-            pipe.random_y()
-            pipe.passed = False
-            pipe.x = pipe_list[index-1].x + pipe.interval
+            pipe.reposition(pipe_list[index - 1].x + pipe.interval, pipe_list[index - 1].course_index + 1)
 
 
 def check_crash(bird, base, pipes):
@@ -124,11 +130,11 @@ def check_crash(bird, base, pipes):
         upper_pipe_offset = tuple(map(math.floor, (pipe.x - bird.x, pipe.upper_y - bird.y)))
 
         # Bird has crashed at the lower pipe
-        if bird.get_mask().overlap(pipe.get_mask()[0], lower_pipe_offset):
+        if bird.collide_mask(pipe.get_mask()[0], lower_pipe_offset):
             return True
 
         # Bird has crashed at the upper pipe
-        elif bird.get_mask().overlap(pipe.get_mask()[1], upper_pipe_offset):
+        elif bird.collide_mask(pipe.get_mask()[1], upper_pipe_offset):
             return True
 
         # Check if bird is above the sky limit and in a pipe
@@ -169,15 +175,18 @@ def gameover_text(screen):
     The surface/screen of the game for displaying purposes
     """
     # Game-over text
-    screen.blit(sprites_dict['gameover'].convert_alpha(),
+    screen.blit(sprites_dict.convert_alpha('gameover'),
                 ((DISPLAY_WIDTH / 2) - (sprites_dict['gameover'].get_width() / 2),
                  (DISPLAY_HEIGHT / 2) - (sprites_dict['gameover'].get_height() / 2)))
 
 
-def initialize_game_elements():
+def initialize_game_elements(course):
     """
     Creates all class instances needed for the game, then saves all instances into a dictionary
 
+    :param course: type: game.course.Course
+    The pipe course of the game
+
     :return: type: dict
     A dictionary containing all the class instances needed for the game to function
     """
@@ -189,8 +198,8 @@ def initialize_game_elements():
     bird = Bird((DISPLAY_WIDTH / 2) - Bird.width, DISPLAY_HEIGHT / 2)
 
     # Initialize pipes
-    pipe1 = Pipe(DISPLAY_WIDTH * 2)
-    pipe2 = Pipe(pipe1.x + Pipe.interval)
+    pipe1 = Pipe(DISPLAY_WIDTH * 2, course=course, course_index=0)
+    pipe2 = Pipe(pipe1.x + Pipe.interval, course=course, course_index=1)
 
     # Initialize score
     score = Score()
@@ -203,7 +212,7 @@ def initialize_game_elements():
     }
 
 
-def main():
+def main(course=None, dirty=False):
     """
     The main function of the game
 
@@ -217,19 +226,25 @@ def main():
             3d. Handle player input (Jump or no jump)
             3e. Handle score increment & render score
             3f. Check if player has crashed
+
+    :param course: type: game.course.Course
+    The pipe course of the game, a random course is used if not provided
+
+    :param dirty: type: bool
+    If True, only the areas of the screen that changed are redrawn & updated every frame, else the whole screen
     """
 
     # Initialize pygame module
     pygame.init()
 
-    # Setup window properties
-    screen = setup_game_window()
+    # Setup window properties, drawn to through dirty rect tracking
+    screen = DirtyScreen(setup_game_window(), sprites_dict.convert('background-day'), dirty)
 
     # Initialize clock
     clock = pygame.time.Clock()
 
     # Initialize game elements
-    game_elements_dict = initialize_game_elements()
+    game_elements_dict = initialize_game_elements(course if course is not None else Course())
 
     # Initialize game variables
     crashed = False
@@ -237,6 +252,8 @@ def main():
 
     # Game loop
     while True:
+        profiler.start_frame()
+
         jump = False
         # Define
         clock.tick(FPS)
@@ -255,13 +272,17 @@ def main():
                     jump = True
                     start = True
 
+        profiler.mark("frame cap & events")
+
         # Check if alive
         if not crashed:
-            # Clear previous screen state & render background
-            screen.blit(sprites_dict['background-day'].convert(), (0, 0))
+            # Clear previous screen state by restoring the background
+            screen.clear()
+            profiler.mark("background")
 
             # Draw bird to screen
             game_elements_dict['bird'].draw_to_screen(screen)
+            profiler.mark("bird")
 
             if start:
                 # Draw pipes to the screen
@@ -270,6 +291,7 @@ def main():
 
                 # Update pipes coordinates
                 pipes_animation_handler(game_elements_dict['pipe'])
+                profiler.mark("pipes")
 
             # Draw bases to screen
             for base in game_elements_dict['base']:
@@ -277,6 +299,7 @@ def main():
 
             # Update base coordinates
             base_animation_handler(game_elements_dict['base'])
+            profiler.mark("base")
 
             if start:
                 if jump:
@@ -286,24 +309,41 @@ def main():
                 else:
                     # Bird no jump
                     game_elements_dict['bird'].do_nothing()
+                profiler.mark("physics")
 
                 # Check if passed pipe
                 score_handler(game_elements_dict['bird'], game_elements_dict['pipe'], game_elements_dict['score'])
+                profiler.mark("score_handler")
 
                 # Render score
                 game_elements_dict['score'].draw_to_screen(screen)
+                profiler.mark("text")
 
                 # Check if crashed
                 if check_crash(game_elements_dict['bird'], game_elements_dict['base'], game_elements_dict['pipe']):
                     crashed = True
+                profiler.mark("check_crash")
 
         else:
             # Dead
             gameover_text(screen)
 
         # Update screen
-        pygame.display.update()
+        screen.update()
+        profiler.mark("display")
 
 
 if __name__ == '__main__':
-    main()
+    # Parse command line options
+    parser = argparse.ArgumentParser(description="Play Flappy bird")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed of the pipe course, the same seed always plays the same course")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print the time spent in every phase of the game loop when quitting the game")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="Redraw & update only the areas of the screen that changed every frame instead of the "
+                             "whole screen")
+    args = parser.parse_args()
+    profiler.enabled = args.profile
+
+    main(Course(args.seed), args.dirty_rects)
@@ -8,15 +8,25 @@
 from assets import sprites_dict
 from game.base import Base
 from game.bird import Bird
+from game.course import Course
+from game.dirty_screen import DirtyScreen
 from game.pipe import Pipe
+from game.render_policy import RenderPolicy
 from game.score import Score
+from model_store import ModelStore
+from profiling import PhaseProfiler
 
 import pygame
+import numpy as np
 import sys
 import math
 import neat
-import pickle
-import os
+import argparse
+import multiprocessing
+import contextlib
+import statistics
+import train
+import io
 from tabulate import tabulate
 
 # Global variables
@@ -24,6 +34,9 @@ DISPLAY_WIDTH = sprites_dict['background-day'].get_width()
 DISPLAY_HEIGHT = sprites_dict['background-day'].get_height()
 FPS = 30
 
+# Time spent in every phase of the game loop, only recorded when enabled
+profiler = PhaseProfiler(enabled=False)
+
 
 def quit_game():
     """
@@ -77,7 +90,7 @@ def pipes_animation_handler(pipe_list):
     """
     Moves both pipe objects simultaneously
     When any one of the pipe have move beyond the left side of the screen, reset the position of the base back at the
-    end of the other pipe with added interval width
+    end of the other pipe with added interval width, as the next pipe of the course
 
     Note: A single pipe object contains 2 pipes, the upper & lower pipe sprite
 
@@ -90,9 +103,7 @@ def pipes_animation_handler(pipe_list):
     for index, pipe in enumerate(pipe_list, start=0):
         pipe.move()
         if pipe.x + sprites_dict['pipe-green'].get_width() <= 0:
-            pipe.random_y()
-            pipe.passed = False
-            pipe.x = pipe_list[index - 1].x + pipe.interval
+            pipe.reposition(pipe_list[index - 1].x + pipe.interval, pipe_list[index - 1].course_index + 1)
 
 
 def check_crash(game_elements_dict):
@@ -103,26 +114,27 @@ def check_crash(game_elements_dict):
         2. Hitting the pipe (Both upper & lower pipe)
         3. Flying above the screen height and over a pipe
 
-    If any bird were to have crashed, these steps will be followed:
+    Every bird is checked exactly once and the first way of crashing found decides the fitness deduction.
+    Crashed birds are only marked in an alive list while checking, once every bird has been checked these steps will be
+    followed for all crashed birds at once:
         1. Deduct fitness score according to what object it has crashed into
-        2. Remove crashed bird's corresponding genome
-        3. Remove crashed bird's network
-        4. Remove crashed bird from the surviving bird list
-        5. Record the score and fitness of the bird
+        2. Record the score and fitness of the bird
+        3. Remove crashed birds, their genomes & networks from the surviving lists in a single compaction pass
 
     :param game_elements_dict: type: dict
     A dictionary containing all the class instances needed for the game to function
     """
+    base_rects = [item.rect for item in game_elements_dict['base']]
+    alive = [True] * len(game_elements_dict['birds'])
+    penalty = [0] * len(game_elements_dict['birds'])
+
     for index, bird in enumerate(game_elements_dict['birds'], start=0):
 
         # Hit base
-        if bird.rect.collidelist([item.rect for item in game_elements_dict['base']]) != -1:
-            game_elements_dict['genomes'][index][1].fitness -= 10
-            game_elements_dict['ranking'][bird]['fitness score'] = game_elements_dict['genomes'][index][1].fitness
-            game_elements_dict['ranking'][bird]['pipe score'] = game_elements_dict['score'].score
-            del game_elements_dict['networks'][index]
-            del game_elements_dict['genomes'][index]
-            del game_elements_dict['birds'][index]
+        if bird.rect.collidelist(base_rects) != -1:
+            penalty[index] = 10
+            alive[index] = False
+            continue
 
         # Calculate offset for pipe
         for pipe in game_elements_dict['pipe']:
@@ -132,31 +144,37 @@ def check_crash(game_elements_dict):
             upper_pipe_offset = tuple(map(math.floor, (pipe.x - bird.x, pipe.upper_y - bird.y)))
 
             # Hit lower pipe
-            if bird.get_mask().overlap(pipe.get_mask()[0], lower_pipe_offset):
-                game_elements_dict['genomes'][index][1].fitness -= 1
-                game_elements_dict['ranking'][bird]['fitness score'] = game_elements_dict['genomes'][index][1].fitness
-                game_elements_dict['ranking'][bird]['pipe score'] = game_elements_dict['score'].score
-                del game_elements_dict['networks'][index]
-                del game_elements_dict['genomes'][index]
-                del game_elements_dict['birds'][index]
+            if bird.collide_mask(pipe.get_mask()[0], lower_pipe_offset):
+                penalty[index] = 1
 
             # Hit upper pipe
-            elif bird.get_mask().overlap(pipe.get_mask()[1], upper_pipe_offset):
-                game_elements_dict['genomes'][index][1].fitness -= 1
-                game_elements_dict['ranking'][bird]['fitness score'] = game_elements_dict['genomes'][index][1].fitness
-                game_elements_dict['ranking'][bird]['pipe score'] = game_elements_dict['score'].score
-                del game_elements_dict['networks'][index]
-                del game_elements_dict['genomes'][index]
-                del game_elements_dict['birds'][index]
+            elif bird.collide_mask(pipe.get_mask()[1], upper_pipe_offset):
+                penalty[index] = 1
 
             # Check if bird is above the sky limit and in a pipe
             elif bird.y < 0 and pipe.x < bird.x < (pipe.x + pipe.width):
-                game_elements_dict['genomes'][index][1].fitness -= 10
-                game_elements_dict['ranking'][bird]['fitness score'] = game_elements_dict['genomes'][index][1].fitness
-                game_elements_dict['ranking'][bird]['pipe score'] = game_elements_dict['score'].score
-                del game_elements_dict['networks'][index]
-                del game_elements_dict['genomes'][index]
-                del game_elements_dict['birds'][index]
+                penalty[index] = 10
+
+            else:
+                continue
+
+            alive[index] = False
+            break
+
+    if all(alive):
+        return
+
+    # Deduct fitness & record the results of the crashed birds
+    for index, bird in enumerate(game_elements_dict['birds'], start=0):
+        if not alive[index]:
+            genome = game_elements_dict['genomes'][index][1]
+            genome.fitness -= penalty[index]
+            game_elements_dict['ranking'][bird]['fitness score'] = genome.fitness
+            game_elements_dict['ranking'][bird]['pipe score'] = game_elements_dict['score'].score
+
+    # Remove crashed birds, genomes, networks & their last actions in a single pass
+    for key in ['birds', 'genomes', 'networks', 'actions']:
+        game_elements_dict[key] = [item for item, keep in zip(game_elements_dict[key], alive) if keep]
 
 
 def check_generation_crash(game_elements_dict):
@@ -232,7 +250,7 @@ def score_handler(game_elements_dict):
                     genome.fitness += 5
 
 
-def initialize_game_elements(genomes):
+def initialize_game_elements(genomes, config, course):
     """
     Creates all class instances needed for the game, then saves all instances into a dictionary
 
@@ -240,6 +258,12 @@ def initialize_game_elements(genomes):
     :param genomes: type list
     List containing the genomes for every bird
 
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param course: type: game.course.Course
+    The pipe course of the game
+
     :return: type: dict
     A dictionary containing all the class instances needed for the game to function
     """
@@ -274,8 +298,8 @@ def initialize_game_elements(genomes):
                          }
 
     # Initialize pipes
-    pipe1 = Pipe(DISPLAY_WIDTH * 2)
-    pipe2 = Pipe(pipe1.x + Pipe.interval)
+    pipe1 = Pipe(DISPLAY_WIDTH * 2, course=course, course_index=0)
+    pipe2 = Pipe(pipe1.x + Pipe.interval, course=course, course_index=1)
     # Get pipe index
     pipe_x_list = [pipe.x for pipe in [pipe1, pipe2]]
     pipe_index = pipe_x_list.index(min(pipe_x_list))
@@ -289,13 +313,55 @@ def initialize_game_elements(genomes):
         "networks": networks_list,
         "genomes": genomes_list,
         "ranking": ranking,
+        "actions": [False] * len(birds_list),
         "pipe": [pipe1, pipe2],
         "pipe_index": pipe_index,
-        "score": score
+        "score": score,
+        "frame": 0
     }
 
 
-def fitness(genomes, config):
+def draw_birds(game_elements_dict, screen, render_policy):
+    """
+    Draws the surviving birds selected by the render policy with their model name above, or their density heatmap, to
+    the screen
+    The animation states & rects of every surviving bird are updated whether or not the bird is drawn
+
+    :param game_elements_dict: type: dict
+    A dictionary containing all the class instances needed for the game to function
+
+    :param screen: type: pygame.surface
+    The surface/screen of the game for displaying purposes
+
+    :param render_policy: type: game.render_policy.RenderPolicy
+    Policy selecting the birds drawn
+    """
+    birds = game_elements_dict['birds']
+    if render_policy.mode == "all":
+        selected = range(len(birds))
+    else:
+        # Rank the birds against the centre of the gap of the next pipe
+        pipe = game_elements_dict['pipe'][game_elements_dict['pipe_index']]
+        genomes = game_elements_dict['genomes']
+        y = np.array([bird.y for bird in birds], dtype=np.float64)
+        selected = render_policy.select(np.array([genome.fitness for genome_id, genome in genomes]),
+                                        np.abs(y + Bird.height / 2 - (pipe.lower_y - pipe.gap / 2)),
+                                        np.array([genome_id for genome_id, genome in genomes]))
+        if render_policy.mode == "heatmap":
+            render_policy.draw_heatmap(screen, (DISPLAY_WIDTH / 2) - Bird.width, y, Bird.width, Bird.height)
+
+    # Birds not drawn only update their rect, which is needed for collision detection
+    selected = set(selected)
+    for index, bird in enumerate(birds):
+        if index in selected:
+            bird.draw_to_screen(screen)
+            if render_policy.draws_labels:
+                bird.draw_name_label(game_elements_dict['ranking'][bird]['model name'], screen)
+        else:
+            bird.update()
+
+
+def fitness(genomes, config, course=None, decision_interval=1, dirty=False, render_policy=None):
     """
     The main function for the script
     What it does:
@@ -314,24 +380,42 @@ def fitness(genomes, config):
 
     :param config: type: neat.config.Config
     The NEAT configuration file object
+
+    :param course: type: game.course.Course
+    The pipe course of the game, a random course is used if not provided
+
+    :param decision_interval: type: int
+    Number of frames between model outputs, the last action of every bird is repeated in between
+    Fitness is still awarded every frame, so the fitness of different decision intervals can be compared
+
+    :param dirty: type: bool
+    If True, only the areas of the screen that changed are redrawn & updated every frame, else the whole screen
+
+    :param render_policy: type: game.render_policy.RenderPolicy
+    Policy selecting the birds drawn every frame, every bird is drawn if not provided
     """
+    if render_policy is None:
+        render_policy = RenderPolicy()
+
     # Initialize pygame module
     pygame.init()
 
-    # Setup window properties
-    screen = setup_game_window()
+    # Setup window properties, drawn to through dirty rect tracking
+    screen = DirtyScreen(setup_game_window(), sprites_dict.convert('background-day'), dirty)
 
     # Initialize clock
     clock = pygame.time.Clock()
 
     # Initialize game elements
-    game_elements_dict = initialize_game_elements(genomes)
+    game_elements_dict = initialize_game_elements(genomes, config, course if course is not None else Course())
 
     # Initialize game variables
     crashed = False
 
     # Game loop
     while True:
+        profiler.start_frame()
+
         # Define
         clock.tick(FPS)
         # Loop events
@@ -345,15 +429,17 @@ def fitness(genomes, config):
                 if event.key == 27:
                     quit_game()
 
+        profiler.mark("frame cap & events")
+
         # Check if alive
         if not crashed:
-            # Clear previous screen state & render background
-            screen.blit(sprites_dict['background-day'].convert(), (0, 0))
+            # Clear previous screen state by restoring the background
+            screen.clear()
+            profiler.mark("background")
 
-            # Draw all birds to screen with their model name above
-            for bird in game_elements_dict['birds']:
-                bird.draw_to_screen(screen)
-                bird.draw_name_label(game_elements_dict['ranking'][bird]['model name'], screen)
+            # Draw the birds selected by the render policy to screen with their model name above
+            draw_birds(game_elements_dict, screen, render_policy)
+            profiler.mark("birds & labels")
 
             # Draw pipes to the screen
             for pipe in game_elements_dict['pipe']:
@@ -361,6 +447,7 @@ def fitness(genomes, config):
 
             # Update pipes coordinates
             pipes_animation_handler(game_elements_dict['pipe'])
+            profiler.mark("pipes")
 
             # Draw bases to screen
             for base in game_elements_dict['base']:
@@ -368,43 +455,57 @@ def fitness(genomes, config):
 
             # Update base coordinates
             base_animation_handler(game_elements_dict['base'])
+            profiler.mark("base")
+
+            # Only query the models every decision interval, the last actions are repeated in between
+            decide = game_elements_dict['frame'] % decision_interval == 0
+            game_elements_dict['frame'] += 1
 
             # Neural network output (Flap or no flap?)
             for index, bird in enumerate(game_elements_dict['birds']):
                 # Award fitness for surviving
                 game_elements_dict['genomes'][index][1].fitness += 0.1
 
-                # Get output of model
-                # Pass model bird location, pipes location
-                output = game_elements_dict['networks'][index].activate(((bird.y+bird.height/2),
-                                                                         game_elements_dict['pipe'][game_elements_dict['pipe_index']].upper_y - bird.y,
-                                                                         (bird.y+bird.height) - game_elements_dict['pipe'][game_elements_dict['pipe_index']].lower_y)
-                                                                        )
-                # Activation function evaluation
-                if output[0] > 0.5:
+                if decide:
+                    # Get output of model
+                    # Pass model bird location, pipes location
+                    output = game_elements_dict['networks'][index].activate(((bird.y+bird.height/2),
+                                                                             game_elements_dict['pipe'][game_elements_dict['pipe_index']].upper_y - bird.y,
+                                                                             (bird.y+bird.height) - game_elements_dict['pipe'][game_elements_dict['pipe_index']].lower_y)
+                                                                            )
+                    # Activation function evaluation
+                    game_elements_dict['actions'][index] = output[0] > 0.5
+
+                if game_elements_dict['actions'][index]:
                     bird.jump()
                 else:
                     bird.do_nothing()
+            profiler.mark("inference & physics")
 
             # Check if any bird crashed
             check_crash(game_elements_dict)
+            profiler.mark("check_crash")
 
             # Award points for remaining bird if passed pipe
             score_handler(game_elements_dict)
+            profiler.mark("score_handler")
 
             # Render score
             game_elements_dict['score'].draw_to_screen(screen)
+            profiler.mark("text")
 
             # Check if all test birds has crashed
             if check_generation_crash(game_elements_dict):
                 crashed = True
                 print_rankings(game_elements_dict)
+                profiler.print_summary()
 
             # Over score threshold, ending test
             if game_elements_dict['score'].score >= 1000:
                 print("Score threshold reached, ending test...")
                 update_rankings(game_elements_dict)
                 print_rankings(game_elements_dict)
+                profiler.print_summary()
                 quit_game()
 
         else:
@@ -413,7 +514,119 @@ def fitness(genomes, config):
             break
 
         # Update screen
-        pygame.display.update()
+        screen.update()
+        profiler.mark("display")
+
+
+def play_course(genomes, config, seed, max_steps, decision_interval):
+    """
+    Plays a single headless game with every model on a seeded pipe course, using the batched game loop of the training
+    script since models do not affect each other
+    Used by the worker processes of the tournament
+
+    :param genomes: type: list
+    List containing the (genome_id, genome) tuple of every model
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param seed: type: int
+    Seed of the pipe course
+
+    :param max_steps: type: int
+    Maximum number of frames of the game
+
+    :param decision_interval: type: int
+    Number of frames between model outputs
+
+    :return: type: tuple
+    Tuple containing the list of the fitness and the list of the pipe score of every model, in the same order as the
+    genomes
+    """
+    pipe_scores = {}
+
+    # Silence the messages printed by the game loop
+    with contextlib.redirect_stdout(io.StringIO()):
+        train.play_game(genomes, config, Course(seed), True, train.GenerationLimits(max_steps=max_steps),
+                        decision_interval, pipe_scores)
+
+    return [genome.fitness for genome_id, genome in genomes], [pipe_scores[genome_id] for genome_id, genome in genomes]
+
+
+def summarize(values):
+    """
+    Summarizes the results of a model over every course of the tournament
+
+    :param values: type: list
+    List containing the result of the model on every course
+
+    :return: type: tuple
+    Tuple containing the mean, the half width of the 95% confidence interval of the mean (Normal approximation) and
+    the worst result
+    """
+    mean = statistics.mean(values)
+    interval = 1.96 * statistics.stdev(values) / math.sqrt(len(values)) if len(values) > 1 else 0
+
+    return mean, interval, min(values)
+
+
+def tournament(genomes, config, courses, seed, workers, max_steps, decision_interval=1):
+    """
+    Plays every model headlessly on a number of seeded pipe courses spread across worker processes, then prints the
+    rankings of the mean, confidence interval & worst case of the pipe score and fitness of every model
+
+    :param genomes: type: list
+    List containing the (genome_id, genome, model_name) tuple of every model
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param courses: type: int
+    Number of pipe courses played
+
+    :param seed: type: int
+    Seed of the first pipe course, the following courses use the following seeds
+
+    :param workers: type: int
+    Number of worker processes
+
+    :param max_steps: type: int
+    Maximum number of frames of every course
+
+    :param decision_interval: type: int
+    Number of frames between model outputs
+
+    :return: type: dict
+    The rankings of every model, keyed by genome id
+    """
+    models = [(genome_id, genome) for genome_id, genome, model_name in genomes]
+    tasks = [(models, config, course_seed, max_steps, decision_interval) for course_seed in range(seed, seed + courses)]
+
+    # Every course is a task, models keep the same order in the results of every course
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.starmap(play_course, tasks)
+    else:
+        results = [play_course(*task) for task in tasks]
+
+    ranking = {}
+    for index, (genome_id, genome, model_name) in enumerate(genomes):
+        pipe_score, pipe_score_interval, worst_pipe_score = summarize([result[1][index] for result in results])
+        fitness_score, fitness_score_interval, worst_fitness_score = summarize([result[0][index] for result in results])
+        ranking[genome_id] = {"model name": model_name,
+                              "pipe score": pipe_score,
+                              "pipe score 95% CI (+/-)": pipe_score_interval,
+                              "worst pipe score": worst_pipe_score,
+                              "fitness score": fitness_score,
+                              "fitness score 95% CI (+/-)": fitness_score_interval,
+                              "worst fitness score": worst_fitness_score
+                              }
+
+    print("\nTournament of {} models on {} courses (Seeds {} to {})".format(len(genomes), courses, seed,
+                                                                         seed + courses - 1))
+    print_rankings({"ranking": ranking})
+
+    return ranking
 
 
 if __name__ == '__main__':
@@ -421,23 +634,59 @@ if __name__ == '__main__':
     Running NEAT testing simulation
     
     What it does:
-        1. Import our configuration file to use as settings values
-        2. Load all models from the model directory
-        3. Run a game with all loaded models
+        1. Parse command line options & import our configuration file to use as settings values
+        2. Select models from the model store & load them
+        3. Run a game with all loaded models, or a headless tournament on many courses
     """
+    # Parse command line options
+    parser = argparse.ArgumentParser(description="Test NEAT models playing Flappy bird against each other")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed of the pipe course, the same seed always plays the same course")
+    parser.add_argument("--decision-interval", type=int, default=1,
+                        help="Query the models every this many frames, repeating the last action in between")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print the time spent in every phase of the game loop once the test is done")
+    parser.add_argument("--top", type=int, default=None,
+                        help="Only test this many models with the highest fitness")
+    parser.add_argument("--min-fitness", type=float, default=None,
+                        help="Only test models with at least this training fitness")
+    parser.add_argument("--config-hash", default=None,
+                        help="Only test models trained with the NEAT configuration of this hash")
+    parser.add_argument("--tournament", type=int, default=None,
+                        help="Play a headless tournament on this many seeded courses instead of a single game")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="Number of worker processes playing the courses of the tournament")
+    parser.add_argument("--max-steps", type=int, default=5000,
+                        help="Maximum number of frames of every course of the tournament")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="Redraw & update only the areas of the screen that changed every frame instead of the "
+                             "whole screen")
+    parser.add_argument("--render", choices=RenderPolicy.modes, default="all",
+                        help="Draw every bird, only the top birds by fitness, a random sample or a heatmap of the birds")
+    parser.add_argument("--render-count", type=int, default=20,
+                        help="Number of birds drawn by the top & sample render modes")
+    args = parser.parse_args()
+    if args.decision_interval < 1:
+        parser.error("--decision-interval must be at least 1")
+    profiler.enabled = args.profile
+
     # Import config file
     config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
                                 neat.DefaultStagnation, 'neat-config.ini')
 
-    # Load all models from directory
+    # Select models by their metadata, then only load the selected models
+    store = ModelStore("models")
     genomes = []
-    for model in os.listdir("models"):
-        if model.endswith(".pkl"):
-            print("Loading model {}...".format(model))
-            with open(os.path.join("models/", model), 'rb') as data:
-                # Convert loaded genome into required data structure
-                genome = pickle.load(data)
-                genomes.append((len(genomes) + 1, genome, model))
-
-    # Run game
-    fitness(genomes, config)
+    for model in store.query(args.min_fitness, args.config_hash, top=args.top):
+        print("Loading model {}...".format(model["file"]))
+        # Convert loaded genome into required data structure
+        genome = store.load(model)
+        genomes.append((len(genomes) + 1, genome, model["file"]))
+
+    # Run tournament or game
+    if args.tournament is not None:
+        tournament(genomes, config, args.tournament, args.seed if args.seed is not None else 0, args.workers,
+                   args.max_steps, args.decision_interval)
+    else:
+        fitness(genomes, config, Course(args.seed), args.decision_interval, args.dirty_rects,
+                RenderPolicy(args.render, args.render_count, args.seed if args.seed is not None else 0))
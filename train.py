@@ -5,24 +5,51 @@
 """
 
 from assets import sprites_dict
+from checkpoint import Checkpointer, restore_checkpoint
 from game.base import Base
-from game.bird import Bird
+from game.course import Course
+from game.flock import Flock
 from game.pipe import Pipe
+from game.render_policy import RenderPolicy
 from game.score import Score
 from game.textbox import Textbox
+from model_store import ModelStore, config_hash
+from network import BatchedNetwork, NetworkCache
+from profiling import PhaseProfiler, ProfilerReporter
+from replay import Recorder, Replay
 from visualize import plot_fitness_graph
 
 import pygame
+import numpy as np
 import sys
 import math
 import neat
-import pickle
+import argparse
+import random
+import multiprocessing
+import time
 import os
 
 # Global variables
 DISPLAY_WIDTH = sprites_dict['background-day'].get_width()
 DISPLAY_HEIGHT = sprites_dict['background-day'].get_height()
 FPS = 30
+HEADLESS = False
+DECISION_INTERVAL = 1
+GENERATIONS = 20
+RECORD_DIRECTORY = None
+
+# Population being trained, only set when running the training script
+population = None
+
+# Networks of genomes seen in previous generations, every worker process has its own copy
+network_cache = NetworkCache(max_size=1024)
+
+# Time spent in every phase of the game loop, only recorded when enabled
+profiler = PhaseProfiler(enabled=False)
+
+# Birds drawn every frame when not headless, every bird is always simulated
+render_policy = RenderPolicy()
 
 
 def quit_game():
@@ -77,7 +104,7 @@ def pipes_animation_handler(pipe_list):
     """
     Moves both pipe objects simultaneously
     When any one of the pipe have move beyond the left side of the screen, reset the position of the base back at the
-    end of the other pipe with added interval width
+    end of the other pipe with added interval width, as the next pipe of the course
 
     Note: A single pipe object contains 2 pipes, the upper & lower pipe sprite
 
@@ -90,64 +117,132 @@ def pipes_animation_handler(pipe_list):
     for index, pipe in enumerate(pipe_list, start=0):
         pipe.move()
         if pipe.x + sprites_dict['pipe-green'].get_width() <= 0:
-            pipe.random_y()
-            pipe.passed = False
-            pipe.x = pipe_list[index-1].x + pipe.interval
+            pipe.reposition(pipe_list[index - 1].x + pipe.interval, pipe_list[index - 1].course_index + 1)
 
 
 def check_crash(game_elements_dict):
     """
-    Check if any of the bird in the population has crashed in any of these ways
+    Check if any of the surviving birds in the flock has crashed in any of these ways
     Ways to crash:
         1. Hitting the base
         2. Hitting the pipe (Both upper & lower pipe)
         3. Flying above the screen height and over a pipe
 
+    Pipe collisions are checked in 2 phases, a batched bounding box test picks out the birds that could be touching a
+    pipe, then only those birds are tested pixel by pixel with their masks
+
     If any bird were to have crashed, these steps will be followed:
-        1. Deduct fitness score according to what object it has crashed into
-        2. Remove crashed bird's corresponding genome
-        3. Remove crashed bird's network
-        4. Remove crashed bird from the surviving bird list
+        1. Deduct fitness score according to what object it has crashed into, for every crashed bird at once
+        2. Mark the crashed bird as dead in the flock, it is removed later on by remove_crashed_birds
+
+    Every surviving bird is checked exactly once, the first way of crashing found decides the fitness deduction
 
     :param game_elements_dict: type: dict
     A dictionary containing all the class instances needed for the game to function
     """
-    for index, bird in enumerate(game_elements_dict['birds'], start=0):
+    flock = game_elements_dict['flock']
+    bird_width, bird_height = flock.sprite_size()
+    penalty = np.zeros(flock.size, dtype=np.int64)
 
-        # Hit base
-        if bird.rect.collidelist([item.rect for item in game_elements_dict['base']]) != -1:
-            game_elements_dict['genomes'][index][1].fitness -= 10
-            del game_elements_dict['networks'][index]
-            del game_elements_dict['genomes'][index]
-            del game_elements_dict['birds'][index]
+    # Hit base
+    remaining = flock.alive.copy()
+    for base in game_elements_dict['base']:
+        hit_base = remaining & flock.colliderect(base.rect)
+        penalty[hit_base] = 10
+        remaining &= ~hit_base
 
-        # Calculate offset for pipe
-        for pipe in game_elements_dict['pipe']:
-            # Lower pipe
-            lower_pipe_offset = tuple(map(math.ceil, (pipe.x - bird.x, pipe.lower_y - bird.y)))
-            # Upper pipe
-            upper_pipe_offset = tuple(map(math.floor, (pipe.x - bird.x, pipe.upper_y - bird.y)))
+    for pipe in game_elements_dict['pipe']:
+        # Every bird shares the same x, skip the pipe when it is out of reach horizontally of the widest bird sprite
+        if not (flock.x - pipe.width <= pipe.x <= flock.x + flock.max_width):
+            continue
 
+        lower_mask, upper_mask = pipe.get_mask()
+
+        # Calculate offset for pipe
+        # Lower pipe
+        lower_offset_x = math.ceil(pipe.x - flock.x)
+        lower_offset_y = np.ceil(pipe.lower_y - flock.y).astype(np.int64)
+        # Upper pipe
+        upper_offset_x = math.floor(pipe.x - flock.x)
+        upper_offset_y = np.floor(pipe.upper_y - flock.y).astype(np.int64)
+
+        # Broad phase, the masks can only overlap if the bounding boxes of the sprites overlap
+        near_lower = remaining & ((lower_offset_x < bird_width) & (lower_offset_x + pipe.width > 0) &
+                                  (lower_offset_y < bird_height) & (lower_offset_y + pipe.height > 0))
+        near_upper = remaining & ((upper_offset_x < bird_width) & (upper_offset_x + pipe.width > 0) &
+                                  (upper_offset_y < bird_height) & (upper_offset_y + pipe.height > 0))
+        # Check if bird is above the sky limit and in a pipe
+        above_sky = remaining & (flock.y < 0) & (pipe.x < flock.x < (pipe.x + pipe.width))
+
+        # Exact phase, only for the birds picked out above
+        for index in np.flatnonzero(near_lower | near_upper | above_sky):
             # Hit lower pipe
-            if bird.get_mask().overlap(pipe.get_mask()[0], lower_pipe_offset):
-                game_elements_dict['genomes'][index][1].fitness -= 1
-                del game_elements_dict['networks'][index]
-                del game_elements_dict['genomes'][index]
-                del game_elements_dict['birds'][index]
+            if near_lower[index] and flock.get_mask(index).overlap(lower_mask,
+                                                                   (lower_offset_x, int(lower_offset_y[index]))):
+                penalty[index] = 1
 
             # Hit upper pipe
-            elif bird.get_mask().overlap(pipe.get_mask()[1], upper_pipe_offset):
-                game_elements_dict['genomes'][index][1].fitness -= 1
-                del game_elements_dict['networks'][index]
-                del game_elements_dict['genomes'][index]
-                del game_elements_dict['birds'][index]
+            elif near_upper[index] and flock.get_mask(index).overlap(upper_mask,
+                                                                     (upper_offset_x, int(upper_offset_y[index]))):
+                penalty[index] = 1
 
-            # Check if bird is above the sky limit and in a pipe
-            elif bird.y < 0 and pipe.x < bird.x < (pipe.x + pipe.width):
-                game_elements_dict['genomes'][index][1].fitness -= 10
-                del game_elements_dict['networks'][index]
-                del game_elements_dict['genomes'][index]
-                del game_elements_dict['birds'][index]
+            # Above the sky limit and in a pipe
+            elif above_sky[index]:
+                penalty[index] = 10
+
+            else:
+                continue
+
+            remaining[index] = False
+
+    # Deduct fitness & mark crashed birds as dead
+    crashed = flock.alive & ~remaining
+    game_elements_dict['fitness'][crashed] -= penalty[crashed]
+    flock.alive[crashed] = False
+
+
+def record_fitness(game_elements_dict, indexes):
+    """
+    Copies the fitness accumulated during the game into the genomes of the birds
+    The pipe score of the birds is recorded as well if the game keeps pipe scores
+
+    :param game_elements_dict: type: dict
+    A dictionary containing all the class instances needed for the game to function
+
+    :param indexes: type: numpy.ndarray
+    Indexes of the birds in the flock whose genome fitness are to be recorded
+    """
+    for index in indexes:
+        genome_id, genome = game_elements_dict['genomes'][index]
+        genome.fitness = float(game_elements_dict['fitness'][index])
+
+        if game_elements_dict['pipe_scores'] is not None:
+            game_elements_dict['pipe_scores'][genome_id] = game_elements_dict['score'].score
+
+
+def remove_crashed_birds(game_elements_dict):
+    """
+    Records the fitness of the crashed birds into their genomes, then removes the crashed birds, their networks,
+    genomes and fitness in a single compaction pass so that the surviving birds stay packed together
+
+    :param game_elements_dict: type: dict
+    A dictionary containing all the class instances needed for the game to function
+    """
+    flock = game_elements_dict['flock']
+    if flock.alive.all():
+        return
+
+    # Record fitness of crashed birds before dropping them
+    record_fitness(game_elements_dict, np.flatnonzero(~flock.alive))
+
+    # Compact every list & array down to the surviving birds
+    survivors = flock.compact()
+    game_elements_dict['networks'].compact(survivors)
+    game_elements_dict['genomes'] = [game_elements_dict['genomes'][index] for index in survivors]
+    game_elements_dict['fitness'] = game_elements_dict['fitness'][survivors]
+    game_elements_dict['jump'] = game_elements_dict['jump'][survivors]
+    if game_elements_dict['recorder'] is not None:
+        game_elements_dict['recorder'].compact(survivors)
 
 
 def check_generation_crash(game_elements_dict):
@@ -161,7 +256,7 @@ def check_generation_crash(game_elements_dict):
     True if there are no surviving birds, else False
     """
     # Check if there is any bird surviving
-    if len(game_elements_dict['birds']) == 0:
+    if not game_elements_dict['flock'].alive.any():
         return True
     else:
         return False
@@ -182,7 +277,7 @@ def score_handler(game_elements_dict):
     if not check_generation_crash(game_elements_dict):
         # Check if passed pipe
         for pipe in game_elements_dict['pipe']:
-            if game_elements_dict['birds'][0].x > (pipe.x + pipe.width) and not pipe.passed:
+            if game_elements_dict['flock'].x > (pipe.x + pipe.width) and not pipe.passed:
                 pipe.passed = True
                 game_elements_dict['score'].score += 1
 
@@ -193,11 +288,38 @@ def score_handler(game_elements_dict):
                     game_elements_dict['pipe_index'] = 0
 
                 # Add fitness score to remaining birds which passed the pipe
-                for genome_id, genome in game_elements_dict['genomes']:
-                    genome.fitness += 5
+                game_elements_dict['fitness'][game_elements_dict['flock'].alive] += 5
 
 
-def initialize_game_elements(genomes):
+def draw_birds(game_elements_dict, screen):
+    """
+    Draws the surviving birds selected by the render policy, or their density heatmap, to the screen
+    The animation states & rects of every surviving bird are updated whether or not the bird is drawn
+
+    :param game_elements_dict: type: dict
+    A dictionary containing all the class instances needed for the game to function
+
+    :param screen: type: pygame.surface
+    The surface/screen of the game for displaying purposes
+    """
+    flock = game_elements_dict['flock']
+    if render_policy.mode == "all":
+        flock.draw_to_screen(screen)
+        return
+
+    # Rank the birds against the centre of the gap of the next pipe
+    pipe = game_elements_dict['pipe'][game_elements_dict['pipe_index']]
+    alive = np.flatnonzero(flock.alive)
+    distance = np.abs(flock.y[alive] + flock.height / 2 - (pipe.lower_y - pipe.gap / 2))
+    keys = np.array([game_elements_dict['genomes'][index][0] for index in alive], dtype=np.int64)
+    indexes = alive[render_policy.select(game_elements_dict['fitness'][alive], distance, keys)]
+
+    flock.draw_to_screen(screen, indexes)
+    if render_policy.mode == "heatmap":
+        render_policy.draw_heatmap(screen, flock.x, flock.y[alive], flock.width, flock.height)
+
+
+def initialize_game_elements(genomes, config, course, networks=None):
     """
     Creates all class instances needed for the game, then saves all instances into a dictionary
 
@@ -205,6 +327,15 @@ def initialize_game_elements(genomes):
     :param genomes: type list
     List containing the genomes for every bird
 
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param course: type: game.course.Course
+    The pipe course of the game
+
+    :param networks: type: replay.ReplayNetwork
+    Networks of every bird used instead of creating the networks of the genomes, e.g. to play a replay back
+
     :return: type: dict
     A dictionary containing all the class instances needed for the game to function
     """
@@ -212,27 +343,30 @@ def initialize_game_elements(genomes):
     base1 = Base(0, DISPLAY_HEIGHT - Base.height)
     base2 = Base(Base.width, DISPLAY_HEIGHT - Base.height)
 
-    # Initialize bird, network and genome list
-    # These list will record the surviving birds respective network and genomes
-    birds_list = []
+    # Initialize network and genome list, the networks are then compiled to be activated all at once
+    # The index of a network, genome & fitness is the index of its bird in the flock
     networks_list = []
     genomes_list = []
     for genome_id, genome in genomes:
         # Create network for bird
-        # Setup network using genome & config
-        network = neat.nn.FeedForwardNetwork.create(genome, config)
-        networks_list.append(network)
-
-        # Create bird
-        birds_list.append(Bird((DISPLAY_WIDTH / 2) - Bird.width, DISPLAY_HEIGHT / 2))
+        # Setup network using genome & config, unchanged genomes reuse their network from the cache
+        if networks is None:
+            network = network_cache.create(genome, config)
+            networks_list.append(network)
 
         # Define starting fitness
         genome.fitness = 0
         genomes_list.append((genome_id, genome))
 
-    # Initialize pipes
-    pipe1 = Pipe(DISPLAY_WIDTH * 2)
-    pipe2 = Pipe(pipe1.x + Pipe.interval)
+    # Initialize the flock holding every bird of the population
+    flock = Flock((DISPLAY_WIDTH / 2) - Flock.width, DISPLAY_HEIGHT / 2, len(genomes_list))
+
+    # Fitness is accumulated for every bird at once, then recorded into the genomes once the bird is removed
+    fitness_array = np.zeros(len(genomes_list), dtype=np.float64)
+
+    # Initialize pipes as the first 2 pipes of the course
+    pipe1 = Pipe(DISPLAY_WIDTH * 2, course=course, course_index=0)
+    pipe2 = Pipe(pipe1.x + Pipe.interval, course=course, course_index=1)
     # Get pipe index
     pipe_x_list = [pipe.x for pipe in [pipe1, pipe2]]
     pipe_index = pipe_x_list.index(min(pipe_x_list))
@@ -248,20 +382,96 @@ def initialize_game_elements(genomes):
 
     return {
         "base": [base1, base2],
-        "birds": birds_list,
-        "networks": networks_list,
+        "flock": flock,
+        "networks": BatchedNetwork(networks_list) if networks is None else networks,
         "genomes": genomes_list,
+        "fitness": fitness_array,
+        "jump": np.zeros(len(genomes_list), dtype=bool),
         "pipe": [pipe1, pipe2],
         "pipe_index": pipe_index,
         "score": score,
         "bird_counter": bird_counter,
-        "generation_counter": generation_counter
+        "generation_counter": generation_counter,
+        "pipe_scores": None,
+        "recorder": None,
+        "steps": 0,
+        "start_time": time.perf_counter(),
+        "survivors": None,
+        "plateau_steps": 0
     }
 
 
-def fitness(genomes, config):
+class GenerationLimits:
+    """
+    Stopping rules ending a generation early while birds are still alive, so that a generation of good networks takes
+    a bounded amount of time instead of running until the score limit
+    Once a rule is met the surviving birds are credited the fitness they have accumulated so far, the same as reaching
+    the score limit, every rule is disabled when set to None
+
+    Rules:
+        1. max_steps, the number of game ticks played
+        2. time_limit, the wall-clock seconds spent playing the game
+        3. plateau, the number of game ticks played without any bird crashing since the first pipe was passed
+           Surviving birds gain the same fitness every tick & crashed birds lose the crash penalty, so every surviving
+           bird already ranks above every crashed bird and the ranking of the genomes only changes when a bird crashes
+           Ticks are only counted once the first pipe has been passed, every bird survives until the first pipe
+           arrives so the ranking would otherwise look settled before any bird was tested
+           Crashes are only known for the whole population when every genome plays in the same game, so the rule
+           cannot be used with ParallelFitness spreading the population across several workers
+    """
+    def __init__(self, max_steps=None, time_limit=None, plateau=None):
+        """
+        Constructor for the GenerationLimits class
+
+        :param max_steps: type: int
+        Maximum number of game ticks of a generation
+
+        :param time_limit: type: float
+        Maximum number of wall-clock seconds of a generation
+
+        :param plateau: type: int
+        Number of game ticks without any bird crashing, after the first pipe, before ending the generation
+        """
+        self.max_steps = max_steps
+        self.time_limit = time_limit
+        self.plateau = plateau
+
+    def check(self, game_elements_dict):
+        """
+        Checks every stopping rule, called once per game tick after the tick has been counted
+
+        :param game_elements_dict: type: dict
+        A dictionary containing all the class instances needed for the game to function
+
+        :return: type: str
+        The name of the rule that was met, else None
+        """
+        # Ranking is unchanged if no bird crashed since the last tick, nothing is settled before the first pipe
+        survivors = game_elements_dict['fitness'].size
+        if game_elements_dict['score'].score > 0 and survivors == game_elements_dict['survivors']:
+            game_elements_dict['plateau_steps'] += 1
+        else:
+            game_elements_dict['plateau_steps'] = 0
+        game_elements_dict['survivors'] = survivors
+
+        if self.max_steps is not None and game_elements_dict['steps'] >= self.max_steps:
+            return "Step limit"
+        if self.time_limit is not None and time.perf_counter() - game_elements_dict['start_time'] >= self.time_limit:
+            return "Time limit"
+        if self.plateau is not None and game_elements_dict['plateau_steps'] >= self.plateau:
+            return "Ranking plateau"
+
+        return None
+
+
+# Stopping rules of every generation, no rules by default
+generation_limits = GenerationLimits()
+
+
+def play_game(genomes, config, course, headless, limits=None, decision_interval=1, pipe_scores=None, recorder=None,
+              networks=None, generation=None, on_frame=None):
     """
-    The main function for the script
+    Plays a single game with every genome and records their fitness
     What it does:
         1. Setups game windows & clock
         2. Creates all needed class instances for the game
@@ -278,110 +488,400 @@ def fitness(genomes, config):
 
     :param config: type: neat.config.Config
     The NEAT configuration file object
+
+    :param course: type: game.course.Course
+    The pipe course of the game
+
+    :param headless: type: bool
+    If True, run the game logic only without a window, rendering or frame cap
+
+    :param limits: type: GenerationLimits
+    The stopping rules ending the generation early, no rules if not provided
+
+    :param decision_interval: type: int
+    Number of game ticks between network activations, the last action of every bird is repeated in between
+    Fitness is still awarded every game tick, so the fitness of different decision intervals can be compared
+
+    :param pipe_scores: type: dict
+    If provided, the pipe score of every genome is recorded into it once the bird crashes or the game ends, keyed by
+    genome id
+
+    :param recorder: type: replay.Recorder
+    If provided, the flaps of every bird are recorded into it every game tick
+
+    :param networks: type: replay.ReplayNetwork
+    Networks of every bird used instead of creating the networks of the genomes, e.g. to play a replay back
+
+    :param generation: type: int
+    Generation displayed when not headless, the generation of the training population if not provided, nothing is
+    displayed if neither is known
+
+    :param on_frame: type: function
+    If provided and not headless, called with the screen after every frame is drawn, e.g. to save the frames of a video
+
+    :return: type: int
+    Number of game ticks played
     """
-    # Initialize pygame module
-    pygame.init()
+    if limits is None:
+        limits = GenerationLimits()
+
+    if headless:
+        # Only the font module is needed, no window is created
+        pygame.font.init()
+        screen = None
+        clock = None
+    else:
+        # Initialize pygame module
+        pygame.init()
 
-    # Setup window properties
-    screen = setup_game_window()
+        # Setup window properties
+        screen = setup_game_window()
 
-    # Initialize clock
-    clock = pygame.time.Clock()
+        # Initialize clock
+        clock = pygame.time.Clock()
 
     # Initialize game elements
-    game_elements_dict = initialize_game_elements(genomes)
+    game_elements_dict = initialize_game_elements(genomes, config, course, networks)
+    game_elements_dict['pipe_scores'] = pipe_scores
+    game_elements_dict['recorder'] = recorder
+    if generation is None and population is not None:
+        generation = population.generation
 
     # Initialize game variables
     crashed = False
+    ended = False
 
     # Game loop
     while True:
-        # Define
-        clock.tick(FPS)
-        # Loop events
-        for event in pygame.event.get():
-            # Quit game when X is pressed
-            if event.type == pygame.QUIT:
-                quit_game()
-
-            elif event.type == pygame.KEYDOWN:
-                # Quit game when ESC key is pressed
-                if event.key == 27:
+        profiler.start_frame()
+
+        if not headless:
+            # Define
+            clock.tick(FPS)
+            # Loop events
+            for event in pygame.event.get():
+                # Quit game when X is pressed
+                if event.type == pygame.QUIT:
                     quit_game()
 
-        # Check if alive
-        if not crashed:
-            # Clear previous screen state & render background
-            screen.blit(sprites_dict['background-day'].convert(), (0, 0))
+                elif event.type == pygame.KEYDOWN:
+                    # Quit game when ESC key is pressed
+                    if event.key == 27:
+                        quit_game()
 
-            # Draw all birds to screen
-            for bird in game_elements_dict['birds']:
-                bird.draw_to_screen(screen)
+            profiler.mark("frame cap & events")
 
-            # Draw pipes to the screen
-            for pipe in game_elements_dict['pipe']:
-                pipe.draw_to_screen(screen)
+        # Check if alive
+        if not crashed:
+            if headless:
+                # Only animate birds & update rects needed for collision detection
+                game_elements_dict['flock'].update()
+                profiler.mark("birds")
+            else:
+                # Clear previous screen state & render background
+                screen.blit(sprites_dict.convert('background-day'), (0, 0))
+                profiler.mark("background")
+
+                # Draw the birds selected by the render policy to screen
+                draw_birds(game_elements_dict, screen)
+                profiler.mark("birds")
+
+                # Draw pipes to the screen
+                for pipe in game_elements_dict['pipe']:
+                    pipe.draw_to_screen(screen)
 
             # Update pipes coordinates
             pipes_animation_handler(game_elements_dict['pipe'])
+            profiler.mark("pipes")
 
             # Draw bases to screen
             for base in game_elements_dict['base']:
-                base.draw_to_screen(screen)
+                if headless:
+                    base.update_rect()
+                else:
+                    base.draw_to_screen(screen)
 
             # Update base coordinates
             base_animation_handler(game_elements_dict['base'])
+            profiler.mark("base")
 
             # Neural network output (Flap or no flap?)
-            for index, bird in enumerate(game_elements_dict['birds']):
-                # Award fitness for surviving
-                game_elements_dict['genomes'][index][1].fitness += 0.1
+            flock = game_elements_dict['flock']
+            pipe = game_elements_dict['pipe'][game_elements_dict['pipe_index']]
+
+            # Award fitness for surviving
+            game_elements_dict['fitness'][flock.alive] += 0.1
 
-                # Get output of model
+            # Only query the models every decision interval, the last actions are repeated in between
+            if game_elements_dict['steps'] % decision_interval == 0:
+                # Get output of every model in a single batched forward pass
                 # Pass model bird location, pipes location
-                output = game_elements_dict['networks'][index].activate(((bird.y+bird.height/2),
-                                                                         game_elements_dict['pipe'][game_elements_dict['pipe_index']].upper_y - bird.y,
-                                                                         (bird.y+bird.height) - game_elements_dict['pipe'][game_elements_dict['pipe_index']].lower_y)
-                                                                        )
+                output = game_elements_dict['networks'].activate(np.column_stack(((flock.y + flock.height / 2),
+                                                                                  pipe.upper_y - flock.y,
+                                                                                  (flock.y + flock.height) -
+                                                                                  pipe.lower_y)))
                 # Activation function evaluation
-                if output[0] > 0.5:
-                    bird.jump()
-                else:
-                    bird.do_nothing()
+                game_elements_dict['jump'] = output[:, 0] > 0.5
+            profiler.mark("inference")
+
+            # Jump or do nothing for every surviving bird at once
+            if recorder is not None:
+                recorder.record(game_elements_dict['jump'])
+            flock.step(game_elements_dict['jump'])
+            profiler.mark("physics")
 
-            # Check if any bird crashed
+            # Check if any bird crashed, then remove them all at once
             check_crash(game_elements_dict)
+            profiler.mark("check_crash")
+            remove_crashed_birds(game_elements_dict)
+            profiler.mark("remove_crashed_birds")
 
             # Award points for remaining bird if passed pipe
             score_handler(game_elements_dict)
+            profiler.mark("score_handler")
 
-            # Render score
-            game_elements_dict['score'].draw_to_screen(screen)
+            if not headless:
+                # Render score
+                game_elements_dict['score'].draw_to_screen(screen)
 
-            # Render number of surviving birds
-            game_elements_dict['bird_counter'].text = "Birds: {}".format(len(game_elements_dict['birds']))
-            game_elements_dict['bird_counter'].draw_to_screen(screen)
+                # Render number of surviving birds
+                game_elements_dict['bird_counter'].text = "Birds: {}".format(game_elements_dict['flock'].alive.sum())
+                game_elements_dict['bird_counter'].draw_to_screen(screen)
 
-            # Render generation
-            game_elements_dict['generation_counter'].text = "Generation: {}".format(population.generation)
-            game_elements_dict['generation_counter'].draw_to_screen(screen)
+                # Render generation, if known
+                if generation is not None:
+                    game_elements_dict['generation_counter'].text = "Generation: {}".format(generation)
+                    game_elements_dict['generation_counter'].draw_to_screen(screen)
+                profiler.mark("text")
 
             # Check if whole generation has crashed
             if check_generation_crash(game_elements_dict):
                 crashed = True
 
+            # Count the game tick, however the game ends
+            game_elements_dict['steps'] += 1
+
             # Over score threshold, skip generation
             if game_elements_dict['score'].score >= 1000:
                 print("Score limit reached, skipping generation")
-                break
+                record_fitness(game_elements_dict, np.flatnonzero(game_elements_dict['flock'].alive))
+                ended = True
+            else:
+                # Stopping rule met, credit surviving birds the same as reaching the score limit
+                limit = limits.check(game_elements_dict)
+                if limit is not None and not crashed:
+                    print("{} reached, ending generation".format(limit))
+                    record_fitness(game_elements_dict, np.flatnonzero(game_elements_dict['flock'].alive))
+                    ended = True
 
         else:
             # Dead
-            pygame.quit()
+            if not headless:
+                pygame.quit()
+            break
+
+        if not headless:
+            # Update screen
+            pygame.display.update()
+            profiler.mark("display")
+
+            if on_frame is not None:
+                on_frame(screen)
+
+        # The last frame is still displayed before ending the game early
+        if ended:
             break
 
-        # Update screen
-        pygame.display.update()
+    return game_elements_dict['steps']
+
+
+def evaluate_genomes(genomes, config, course, limits, decision_interval, profile, record):
+    """
+    Plays a single headless game with the genomes on the pipe course
+    Used by the worker processes of ParallelFitness, so the fitness is returned instead of only being recorded in the
+    genomes which are copies of the ones in the main process
+
+    :param genomes: type: list
+    List containing the genomes for every bird
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+
+    :param course: type: game.course.Course
+    The pipe course of the game
+
+    :param limits: type: GenerationLimits
+    The stopping rules ending the generation early
+
+    :param decision_interval: type: int
+    Number of game ticks between network activations
+
+    :param profile: type: bool
+    If True, the time spent in every phase of the game loop is recorded
+
+    :param record: type: bool
+    If True, the game is recorded & the replay of the genome with the highest fitness is returned
+
+    :return: type: tuple
+    Tuple containing the list of the fitness of every genome in the same order as the genomes, the number of network
+    cache hits & misses, the profiler state of the game and the replay of the best genome, None if not recorded
+    """
+    hits, misses = network_cache.hits, network_cache.misses
+    profiler.enabled = profile
+    profiler.reset()
+    recorder = Recorder(genomes, course.seed) if record else None
+
+    play_game(genomes, config, course, headless=True, limits=limits, decision_interval=decision_interval,
+              recorder=recorder)
+
+    replay = recorder.replay([best_genome(genomes)]) if record else None
+
+    return ([genome.fitness for genome_id, genome in genomes],
+            network_cache.hits - hits, network_cache.misses - misses, profiler.state(), replay)
+
+
+def best_genome(genomes):
+    """
+    Finds the genome with the highest fitness, the first one if several genomes share the highest fitness
+
+    :param genomes: type: list
+    List containing the genomes for every bird
+
+    :return: type: tuple
+    The (genome_id, genome) tuple of the best genome
+    """
+    return max(genomes, key=lambda item: item[1].fitness)
+
+
+def save_replay(replays, directory, generation):
+    """
+    Saves the replay of the best bird of a generation, so that the best run of every generation can be watched again
+    with replay.py without simulating the population
+
+    :param replays: type: list
+    List containing a replay of a single bird for every game played, the replay of the bird with the highest fitness
+    is saved
+
+    :param directory: type: str
+    Directory the replays are saved into
+
+    :param generation: type: int
+    The generation that was just played
+    """
+    best = max(replays, key=lambda replay: replay.birds[0][1])
+
+    os.makedirs(directory, exist_ok=True)
+    Replay(best.seed, generation, best.birds).save(os.path.join(directory, "generation-{}.replay".format(generation)))
+
+
+def fitness(genomes, config):
+    """
+    The fitness function for the script, plays a single game with the whole population on a new random pipe course
+
+    :param genomes: type: list
+    List containing the genomes for every bird
+
+    :param config: type: neat.config.Config
+    The NEAT configuration file object
+    """
+    course = Course()
+    recorder = Recorder(genomes, course.seed) if RECORD_DIRECTORY is not None else None
+
+    play_game(genomes, config, course, HEADLESS, generation_limits, DECISION_INTERVAL, recorder=recorder)
+
+    # Keep the best run of the generation
+    if recorder is not None:
+        save_replay([recorder.replay([best_genome(genomes)])], RECORD_DIRECTORY, population.generation)
+
+
+class ParallelFitness:
+    """
+    Fitness function that spreads the population across worker processes
+    Every worker plays a headless game with its share of the genomes on the same pipe course, birds do not affect each
+    other so the fitness values are exactly the same as playing a single game with the whole population
+    """
+    def __init__(self, workers, limits=None, decision_interval=1, record_directory=None):
+        """
+        Constructor for the ParallelFitness class
+
+        :param workers: type: int
+        Number of worker processes
+
+        :param limits: type: GenerationLimits
+        The stopping rules ending the generation early, applied by every worker, no rules if not provided
+        The plateau rule needs the crashes of the whole population, so it cannot be used with more than 1 worker
+
+        :param decision_interval: type: int
+        Number of game ticks between network activations
+
+        :param record_directory: type: str
+        If provided, the replay of the best genome of every generation is saved into the directory
+        """
+        self._workers = workers
+        self._limits = limits if limits is not None else GenerationLimits()
+        self._decision_interval = decision_interval
+        self._record_directory = record_directory
+        self._pool = multiprocessing.Pool(workers)
+
+    def close(self):
+        """
+        Stops the worker processes once they are done, must be called once the fitness function is no longer used
+        """
+        self._pool.close()
+        self._pool.join()
+
+    def __call__(self, genomes, config):
+        """
+        Evaluates the population, the genomes are dealt out to the workers in turns so that every worker gets a
+        similar share of the population
+
+        :param genomes: type: list
+        List containing the genomes for every bird
+
+        :param config: type: neat.config.Config
+        The NEAT configuration file object
+        """
+        course = Course()
+        shares = [genomes[index::self._workers] for index in range(min(self._workers, len(genomes)))]
+
+        record = self._record_directory is not None
+        results = self._pool.starmap(evaluate_genomes, [(share, config, course, self._limits, self._decision_interval,
+                                                               profiler.enabled, record) for share in shares])
+
+        # Record the fitness from the workers into the genomes & total up the network cache counts & profiles
+        # The profiles of the workers add up to the time spent by all workers, not the wall-clock time
+        for share, (share_fitness, hits, misses, profile, replay) in zip(shares, results):
+            for (genome_id, genome), genome_fitness in zip(share, share_fitness):
+                genome.fitness = genome_fitness
+            network_cache.add_counts(hits, misses)
+            profiler.merge(profile)
+
+        # Keep the best run of the generation out of the best run of every worker
+        if record:
+            save_replay([result[4] for result in results], self._record_directory,
+                        population.generation)
+
+
+class NetworkCacheReporter(neat.reporting.BaseReporter):
+    """
+    NEAT reporter printing the network cache hit & miss counts after every generation
+    """
+    def __init__(self):
+        """
+        Constructor for the NetworkCacheReporter class
+        """
+        self._hits = 0
+        self._misses = 0
+
+    def post_evaluate(self, config, population, species, best_genome):
+        """
+        Prints the network cache hits & misses of the generation that was just evaluated
+        """
+        hits, misses = network_cache.hits - self._hits, network_cache.misses - self._misses
+        self._hits, self._misses = network_cache.hits, network_cache.misses
+
+        print("Network cache: {} hits, {} misses ({:.1f}% hit rate)".format(
+            hits, misses, 100 * hits / max(hits + misses, 1)))
 
 
 if __name__ == '__main__':
@@ -389,36 +889,101 @@ if __name__ == '__main__':
     Running NEAT training
     
     What it does:
-        1. Import our configuration file to use as settings values
-        2. Create population
-        3. Add statistics reporter
-        4. Loop the main function according to the number of generation
-        5. Save the best genome and pickle it into a file
+        1. Parse command line options & import our configuration file to use as settings values
+        2. Create population, or resume it from a checkpoint
+        3. Add statistics reporter & checkpointer
+        4. Loop the main function according to the number of generation left
+        5. Save the best genome into the model store
         6. Create visualizations to provide information about the training process
     """
+    # Parse command line options
+    parser = argparse.ArgumentParser(description="Train a NEAT model to play Flappy bird")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run the game logic without a window, rendering or frame cap")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes evaluating the population, more than 1 implies --headless")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed of the whole training run, the population and every pipe course, for reproducible runs")
+    parser.add_argument("--max-steps", type=int, default=None,
+                        help="End a generation after this many game ticks")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="End a generation after this many seconds of wall-clock time")
+    parser.add_argument("--plateau", type=int, default=None,
+                        help="End a generation once no bird has crashed for this many game ticks after the first pipe, "
+                             "cannot be used with --workers")
+    parser.add_argument("--decision-interval", type=int, default=1,
+                        help="Query the networks every this many game ticks, repeating the last action in between")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print the time spent in every phase of the game loop after every generation")
+    parser.add_argument("--checkpoint-interval", type=int, default=1,
+                        help="Save a checkpoint of the training state every this many generations")
+    parser.add_argument("--checkpoint-dir", default="checkpoints",
+                        help="Directory the checkpoints are saved into")
+    parser.add_argument("--resume", default=None,
+                        help="Checkpoint to resume training from, or a directory to resume its latest checkpoint")
+    parser.add_argument("--record-dir", default=None,
+                        help="Save a replay of the best run of every generation into this directory, see replay.py")
+    parser.add_argument("--render", choices=RenderPolicy.modes, default="all",
+                        help="Draw every bird, only the top birds by fitness, a random sample or a heatmap of the birds")
+    parser.add_argument("--render-count", type=int, default=20,
+                        help="Number of birds drawn by the top & sample render modes")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.decision_interval < 1:
+        parser.error("--decision-interval must be at least 1")
+    if args.plateau is not None and args.workers > 1:
+        parser.error("--plateau needs every genome in a single game, it cannot be used with --workers")
+
+    # Seed the random module used by NEAT & for picking the pipe course of every generation
+    if args.seed is not None:
+        random.seed(args.seed)
+    HEADLESS = args.headless or args.workers > 1
+    generation_limits = GenerationLimits(args.max_steps, args.time_limit, args.plateau)
+    DECISION_INTERVAL = args.decision_interval
+    RECORD_DIRECTORY = args.record_dir
+    profiler.enabled = args.profile
+    render_policy = RenderPolicy(args.render, args.render_count, args.seed if args.seed is not None else 0)
+
     # Import config file
     config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
                                 neat.DefaultStagnation, 'neat-config.ini')
 
-    # Create population
-    population = neat.Population(config)
+    # Create population, or resume it & the statistics from a checkpoint
+    statistics = neat.StatisticsReporter()
+    if args.resume is not None:
+        population = restore_checkpoint(args.resume, config, statistics)
+    else:
+        population = neat.Population(config)
 
     # Initialize stats reporter
     population.add_reporter(neat.StdOutReporter(True))
-    statistics = neat.StatisticsReporter()
     population.add_reporter(statistics)
-
-    # Run fitness function
-    population.run(fitness, 20)
+    population.add_reporter(Checkpointer(population, statistics, args.checkpoint_interval, args.checkpoint_dir))
+    population.add_reporter(NetworkCacheReporter())
+    if args.profile:
+        population.add_reporter(ProfilerReporter(profiler))
+
+    # Run fitness function for the generations left, spread across worker processes if requested
+    if args.workers > 1:
+        parallel_fitness = ParallelFitness(args.workers, generation_limits, DECISION_INTERVAL, RECORD_DIRECTORY)
+        try:
+            population.run(parallel_fitness, GENERATIONS - population.generation)
+        finally:
+            parallel_fitness.close()
+    else:
+        population.run(fitness, GENERATIONS - population.generation)
 
     # Get best genome and save it
     winner = statistics.best_genome()
 
     # Save best model
     print("Saving model...")
-    with open(os.path.join("models/", "winner-{:.0f}.pkl".format(winner.fitness)), 'wb') as data:
-        pickle.dump(winner, data, protocol=pickle.HIGHEST_PROTOCOL)
+    model = ModelStore("models").save(winner, config_hash('neat-config.ini'), args.seed)
+    print("Saved model as {}".format(model["file"]))
 
-    # Visualize fitness graph
+    # Visualize fitness graph, named after the model so that it is never overwritten by the graph of another model
     print("Saving fitness graph...")
-    plot_fitness_graph(statistics)
+    graph = os.path.join("models", os.path.splitext(model["file"])[0].replace("winner", "fitness", 1) + ".png")
+    plot_fitness_graph(statistics, graph)
+    print("Saved fitness graph as {}".format(graph))
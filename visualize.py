@@ -7,7 +7,7 @@ from matplotlib.ticker import MultipleLocator
 import os
 
 
-def plot_fitness_graph(statistics):
+def plot_fitness_graph(statistics, path=None):
     """
     Plot a fitness graph that shows the:
         1. Mean fitness per generation
@@ -19,6 +19,9 @@ def plot_fitness_graph(statistics):
 
     :param statistics: type: neat.statistics.StatisticsReporter
     Statistics reporter object that contains all relevant information about the training progress
+
+    :param path: type: str
+    Path the graph is saved to, named after the best fitness in the model directory if not provided
     """
     # Prepare data
     generation_number = range(0, len(statistics.generation_statistics))
@@ -41,7 +44,9 @@ def plot_fitness_graph(statistics):
     plt.legend(loc='best')
     
     # Save figure
-    plt.savefig(os.path.join("models", "fitness-{:.0f}.png".format(statistics.best_genome().fitness)), format='png')
+    if path is None:
+        path = os.path.join("models", "fitness-{:.0f}.png".format(statistics.best_genome().fitness))
+    plt.savefig(path, format='png')
 
     # Close
     plt.close()